@@ -0,0 +1,335 @@
+"""Frame-time benchmark for the level update loops.
+
+Builds the real level screens in a Kivy window (use a virtual display such
+as xvfb-run on machines without one), stops their clock-driven loop and
+calls ``update(1/60)`` directly, one fixed tick per call, while keeping a
+chosen number of projectiles in flight.
+
+    python benchmarks/bench_levels.py --output results.json
+    python benchmarks/bench_levels.py --scenario mirrors --ticks 2000
+    python benchmarks/bench_levels.py --level 3 --projectiles 64 --ammo bullet=1,laser=1 --rocks 30
+    python benchmarks/bench_levels.py --output new.json --compare results.json
+
+Per scenario it reports update() time percentiles, the net number of
+allocated memory blocks per tick, gen-0 garbage collections per 1000 ticks
+and, from a second tracemalloc pass, the peak bytes allocated inside one
+update().
+"""
+import os
+import sys
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+
+DT = 1.0 / 60.0
+
+SCENARIOS = {
+    'level1': dict(level=1, projectiles=8, ammo={'bullet': 1, 'bomb': 1}, rocks=None, aim='random'),
+    'level2': dict(level=2, projectiles=8, ammo={'bullet': 1, 'bomb': 1, 'laser': 1}, rocks=None, aim='random'),
+    'level3': dict(level=3, projectiles=8, ammo={'bullet': 1, 'bomb': 1, 'laser': 1}, rocks=None, aim='random'),
+    'level2-dense': dict(level=2, projectiles=64, ammo={'bullet': 2, 'bomb': 1, 'laser': 1}, rocks=30, aim='random'),
+    'level3-dense': dict(level=3, projectiles=64, ammo={'bullet': 2, 'bomb': 1, 'laser': 1}, rocks=30, aim='random'),
+    # every laser is aimed so that it bounces off at least one mirror
+    'mirrors': dict(level=2, projectiles=16, ammo={'laser': 1}, rocks=0, aim='mirror'),
+    # every shot is aimed so that it goes through the wormhole
+    'wormhole': dict(level=3, projectiles=32, ammo={'bullet': 1, 'bomb': 1, 'laser': 1}, rocks=0, aim='wormhole'),
+    # a thousand shells in the air at once, for the batched shell renderer (run with --render)
+    'barrage': dict(level=1, projectiles=1000, ammo={'bullet': 1, 'bomb': 1}, rocks=0, aim='random'),
+}
+DEFAULT_SCENARIOS = list(SCENARIOS)
+
+
+def start_kivy(width, height):
+    from kivy.core.text import LabelBase
+    LabelBase.register(name='Press2P', fn_regular='fonts/PressStart2P-Regular.ttf')
+    from kivy.core.window import Window
+    Window.size = (width, height)
+    from kivy.base import EventLoop
+    from kivy.uix.screenmanager import NoTransition
+    from screens.screen_manager import LEVELS, ScreenManagement
+    # keep every level built so a screen handed out here is never torn down under us
+    sm = ScreenManagement(transition=NoTransition(), max_idle_levels=len(LEVELS))
+    Window.add_widget(sm)
+    return sm, EventLoop
+
+
+def pump(event_loop, frames=5):
+    for _ in range(frames):
+        event_loop.idle()
+
+
+def enter_level(sm, event_loop, level, seed, rocks):
+    screen = sm.get_screen(f'level{level}')
+    screen.seed = seed
+    screen.replay_dir = None
+    sm.current = 'level_select'
+    pump(event_loop)
+    sm.current = screen.name
+    pump(event_loop)
+    screen.stop_loop()
+    # the level is held until its layout is checked
+    screen._reveal_layout(wait=True)
+    if rocks is not None:
+        tank, target = screen.tank, screen.target
+        screen.rock_field.generate_blocks(count=rocks, avoid_areas=[
+            (tank.x, tank.y, tank.body_width, tank.body_height),
+            (target.x, target.y, target.width, target.height)])
+    # the benchmark must never finish the level
+    screen.world.set_target(-10000, -10000, 1, 1)
+    screen.remaining_shots = 10 ** 9
+    return screen
+
+
+def random_shots(screen, ammo, rng):
+    while True:
+        kind = rng.choices(list(ammo), weights=list(ammo.values()))[0]
+        yield kind, rng.randrange(272, 360, 2), rng.randint(8, 35)
+
+
+def _tip(screen, angle):
+    from physics import barrel_tip, laser_direction
+    tank = screen.tank
+    tip_x, tip_y = barrel_tip(tank.x, tank.y, tank.body_width, tank.body_height, tank.barrel_height, angle)
+    dx, dy = laser_direction(angle)
+    return tip_x, tip_y, dx, dy
+
+
+def mirror_shots(screen, ammo, rng):
+    from simulation.laser import trace_beam
+    # a fixed zigzag of mirrors in front of the tank, on top of whatever the level placed
+    module = sys.modules[type(screen).__module__]
+    for x, y, angle in ((450, 300, 45), (700, 480, 135), (950, 300, 315), (600, 150, 45)):
+        mirror = module.Mirror(x, y, angle=angle)
+        screen.mirrors.append(mirror)
+        screen.world.add_mirror(mirror.body)
+        screen.obstacles.add(mirror)
+    snapshot = screen.world.snapshot()
+    angles = []
+    for angle in np.arange(270.0, 360.0, 0.5):
+        tip_x, tip_y, dx, dy = _tip(screen, angle)
+        _, events = trace_beam(snapshot, tip_x + dx * 2, tip_y + dy * 2, angle)
+        if any(ev.kind == 'reflect' for ev in events):
+            angles.append(float(angle))
+    if not angles:
+        raise SystemExit('no laser angle reaches a mirror in this layout')
+    while True:
+        yield 'laser', rng.choice(angles), 15
+
+
+def wormhole_shots(screen, ammo, rng):
+    from simulation.laser import trace_beam
+    world = screen.world.snapshot()
+    candidates = {}
+    for angle in range(272, 360, 2):
+        tip_x, tip_y, dx, dy = _tip(screen, angle)
+        for power in range(8, 41):
+            handle = world.spawn_shell('bullet', tip_x - 15, tip_y - 15, angle, power)
+            candidates[handle.id] = (angle, power)
+    shell_shots = set()
+    for _ in range(400):
+        for ev in world.step():
+            if ev.kind == 'teleport':
+                shell_shots.add(candidates[ev.projectile.id])
+        if not world.live_projectiles:
+            break
+    laser_angles = []
+    snapshot = screen.world.snapshot()
+    for angle in np.arange(270.0, 360.0, 0.5):
+        tip_x, tip_y, dx, dy = _tip(screen, angle)
+        _, events = trace_beam(snapshot, tip_x + dx * 2, tip_y + dy * 2, angle)
+        if any(ev.kind == 'teleport' for ev in events):
+            laser_angles.append(float(angle))
+    shell_shots = sorted(shell_shots)
+    kinds = [k for k in ammo if (shell_shots if k != 'laser' else laser_angles)]
+    if not kinds:
+        raise SystemExit('no shot reaches the wormhole in this layout')
+    while True:
+        kind = rng.choices(kinds, weights=[ammo[k] for k in kinds])[0]
+        if kind == 'laser':
+            yield kind, rng.choice(laser_angles), 15
+        else:
+            angle, power = rng.choice(shell_shots)
+            yield kind, angle, power
+
+
+AIMS = {'random': random_shots, 'mirror': mirror_shots, 'wormhole': wormhole_shots}
+
+
+def fire(screen, shot):
+    kind, angle, power = shot
+    screen.current_ammo = kind
+    screen.tank.angle = angle
+    screen.tank.projectile_speed = power
+    screen.fire_projectile()
+
+
+def run_scenario(sm, event_loop, name, spec, ticks, alloc_ticks, seed, render):
+    rng = random.Random(seed)
+    screen = enter_level(sm, event_loop, spec['level'], seed, spec['rocks'])
+    shots = AIMS[spec['aim']](screen, spec['ammo'], rng)
+    target = spec['projectiles']
+
+    def top_up():
+        while len(screen.projectiles) < target:
+            fire(screen, next(shots))
+
+    # warm up caches and the shot generator before measuring
+    for _ in range(60):
+        top_up()
+        screen.update(DT)
+
+    times = np.empty(ticks)
+    render_times = np.empty(ticks) if render else None
+    live = np.empty(ticks)
+    blocks = 0
+    gc_before = gc.get_stats()[0]['collections']
+    for i in range(ticks):
+        top_up()
+        live[i] = len(screen.projectiles)
+        before = sys.getallocatedblocks()
+        start = time.perf_counter_ns()
+        screen.update(DT)
+        times[i] = time.perf_counter_ns() - start
+        blocks += sys.getallocatedblocks() - before
+        if render:
+            start = time.perf_counter_ns()
+            event_loop.idle()
+            render_times[i] = time.perf_counter_ns() - start
+    gc_collections = gc.get_stats()[0]['collections'] - gc_before
+
+    # tracemalloc slows everything down, so allocation sizes get their own pass
+    peaks = np.empty(alloc_ticks)
+    tracemalloc.start()
+    for i in range(alloc_ticks):
+        top_up()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        screen.update(DT)
+        peaks[i] = tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    ms = times / 1e6
+    result = {
+        'scenario': name,
+        'level': spec['level'],
+        'projectiles': target,
+        'ammo': spec['ammo'],
+        'rocks': len(screen.world.rocks),
+        'mirrors': len(screen.world.mirrors),
+        'wormholes': len(screen.world.wormholes),
+        'aim': spec['aim'],
+        'ticks': ticks,
+        'mean_live': float(live.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+        'mean_ms': float(ms.mean()),
+        'alloc_blocks_per_tick': blocks / ticks,
+        'alloc_peak_bytes_per_tick': float(np.median(peaks)) if alloc_ticks else None,
+        'gc_gen0_per_1k_ticks': gc_collections * 1000.0 / ticks,
+    }
+    if render:
+        render_ms = render_times / 1e6
+        result.update({'render_p50_ms': float(np.percentile(render_ms, 50)),
+                       'render_p95_ms': float(np.percentile(render_ms, 95)),
+                       'render_p99_ms': float(np.percentile(render_ms, 99))})
+    screen.projectiles.clear()
+    screen.world.clear_projectiles()
+    return result
+
+
+def metadata(args):
+    import kivy
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'kivy': kivy.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'window': [args.width, args.height],
+        'seed': args.seed,
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {r['scenario']: r for r in json.load(f)['results']}
+    print(f"\ncompared with {baseline_path} (new / old):")
+    for r in results:
+        old = baseline.get(r['scenario'])
+        if old is None:
+            print(f"  {r['scenario']:14s} not in baseline")
+            continue
+        ratios = '  '.join(f"{key[:3]} {r[key] / old[key]:.2f}x" for key in ('p50_ms', 'p95_ms', 'p99_ms')
+                           if old.get(key))
+        print(f"  {r['scenario']:14s} {ratios}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='run only these scenarios (repeatable)')
+    parser.add_argument('--level', type=int, choices=(1, 2, 3), help='custom scenario on this level')
+    parser.add_argument('--projectiles', type=int, default=8, help='projectiles kept in flight (custom)')
+    parser.add_argument('--ammo', default='bullet=1,bomb=1', help='ammo mix as kind=weight,... (custom)')
+    parser.add_argument('--rocks', type=int, help='rock count instead of the level default (custom)')
+    parser.add_argument('--ticks', type=int, default=1200)
+    parser.add_argument('--alloc-ticks', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--render', action='store_true', help='also time a rendered frame after each tick')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.level:
+        ammo = {kind: float(weight) for kind, weight in (item.split('=') for item in args.ammo.split(','))}
+        scenarios = {'custom': dict(level=args.level, projectiles=args.projectiles, ammo=ammo,
+                                    rocks=args.rocks, aim='random')}
+    else:
+        scenarios = {name: SCENARIOS[name] for name in (args.scenario or DEFAULT_SCENARIOS)}
+
+    sm, event_loop = start_kivy(args.width, args.height)
+    results = []
+    for name, spec in scenarios.items():
+        result = run_scenario(sm, event_loop, name, spec, args.ticks, args.alloc_ticks, args.seed, args.render)
+        results.append(result)
+        print(f"{name:14s} live {result['mean_live']:6.1f}  p50 {result['p50_ms']:7.3f} ms  "
+              f"p95 {result['p95_ms']:7.3f} ms  p99 {result['p99_ms']:7.3f} ms  "
+              f"blocks/tick {result['alloc_blocks_per_tick']:7.1f}  "
+              f"peak {result['alloc_peak_bytes_per_tick'] or 0:9.0f} B")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'meta': metadata(args), 'results': results}, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,31 +1,41 @@
-from kivy.config import Config
-
-Config.set('graphics', 'resizable', '1')
-Config.set('graphics', 'fullscreen', '0')  
-Config.set('graphics', 'width', '1280')
-Config.set('graphics', 'height', '720')
-Config.set('graphics', 'show_cursor', '1')
-Config.set('graphics', 'window_state', 'visible')  
-Config.write()
-
-from kivy.core.text import LabelBase
-LabelBase.register(name='Press2P', fn_regular='fonts/PressStart2P-Regular.ttf')
-
-from constants.screen_constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+import os
 from kivy.app import App
-from screens.screen_manager import ScreenManagement
 
-from screens.start_screen import StartScreen
 
 class ToonTanksApp(App):
     def build(self):
-         
+        # the screens open the window, so they are only imported here: the layout
+        # check's worker processes import this file again and must not
+        from screens.clock_trace import start_trace
+        from screens.screen_manager import ScreenManagement
+
         self.player_name = ""  # to memorize player's name
 
+        # TOONTANKS_TRACE=1 records a trace of the whole session, saved on exit
+        if os.environ.get('TOONTANKS_TRACE'):
+            start_trace()
+
         sm = ScreenManagement()
 
         sm.current = 'home'
         return sm
 
+    def on_stop(self):
+        from screens.clock_trace import stop_trace
+        stop_trace()
+
 if __name__ == '__main__':
-    ToonTanksApp().run()
\ No newline at end of file
+    from kivy.config import Config
+
+    Config.set('graphics', 'resizable', '1')
+    Config.set('graphics', 'fullscreen', '0')  
+    Config.set('graphics', 'width', '1280')
+    Config.set('graphics', 'height', '720')
+    Config.set('graphics', 'show_cursor', '1')
+    Config.set('graphics', 'window_state', 'visible')  
+    Config.write()
+
+    from kivy.core.text import LabelBase
+    LabelBase.register(name='Press2P', fn_regular='fonts/PressStart2P-Regular.ttf')
+
+    ToonTanksApp().run()
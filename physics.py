@@ -10,3 +10,13 @@ def reflect_laser(incidence_angle_deg, mirror_angle_deg):
     reflection = -incidence
     reflected_angle = mirror_angle_deg + reflection
     return reflected_angle % 360
+def laser_direction(angle_deg):
+    # the tank angle is 270 when the barrel points right
+    angle_rad = math.radians(angle_deg - 270)
+    return math.cos(angle_rad), math.sin(angle_rad)
+def barrel_tip(tank_x, tank_y, body_width, body_height, barrel_height, angle):
+    center_x = tank_x + body_width / 2
+    center_y = tank_y + body_height * 0.7
+    angle_rad = math.radians(-angle)
+    return (center_x + math.sin(angle_rad) * barrel_height,
+            center_y + math.cos(angle_rad) * barrel_height)
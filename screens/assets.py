@@ -0,0 +1,349 @@
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from kivy.clock import Clock
+from kivy.core.audio import SoundLoader
+from kivy.core.image import Image as CoreImage, ImageLoader
+
+
+class Asset(ABC):
+    """One sound or image, shared by every screen that asks for the same path.
+
+    Nothing is read from disk until the asset is first used. Screens hold a
+    reference between ``acquire()`` and ``release()``; unreferenced assets
+    stay loaded until the cache goes over its budget and drops the least
+    recently used ones.
+    """
+
+    # whether prefetch loads it on the worker thread (see _decode/_upload)
+    threaded = False
+
+    def __init__(self, cache, path):
+        self.cache = cache
+        self.path = path
+        self.obj = None
+        self.size = 0
+        self.refs = 0
+        self.missing = False
+
+    def __bool__(self):
+        # true until a load has failed, so `if self.sfx_x:` does not force a load
+        return not self.missing
+
+    @abstractmethod
+    def _load(self):
+        # returns (obj, size in bytes), obj None if it could not be loaded
+        pass
+
+    def _unload(self):
+        self.obj = None
+
+    def _decode(self):
+        # worker thread: the part of the load that can happen off the main thread
+        return None
+
+    def _upload(self, decoded):
+        # main thread: finish a load _decode started; None loads it here instead
+        if self.obj is None and not self.missing:
+            self.get()
+
+    def get(self):
+        if self.obj is None and not self.missing:
+            self._store(*self._load())
+        elif self.obj is not None:
+            self.cache._touch(self)
+        return self.obj
+
+    def _store(self, obj, size):
+        self.obj, self.size = obj, size
+        self.missing = obj is None
+        self.cache._loaded(self)
+
+    def acquire(self):
+        # pins the asset without loading it; returns self so `x.acquire().get()` reads
+        self.refs += 1
+        return self
+
+    def release(self):
+        if self.refs > 0:
+            self.refs -= 1
+        if self.refs == 0:
+            self.cache.evict()
+
+
+class Sound(Asset):
+    """Stands in for the object SoundLoader.load returns; ``loop`` is kept
+    on the handle so it survives the sound being evicted and reloaded.
+    Prefetching decodes it on the worker thread."""
+
+    threaded = True
+
+    def __init__(self, cache, path):
+        super().__init__(cache, path)
+        self._loop = False
+
+    @property
+    def loop(self):
+        return self._loop
+
+    @loop.setter
+    def loop(self, value):
+        self._loop = value
+        if self.obj is not None:
+            self.obj.loop = value
+
+    def _load(self):
+        snd = SoundLoader.load(self.path)
+        if snd is None:
+            return None, 0
+        snd.loop = self._loop
+        # decoded 16 bit stereo at 44.1kHz; length is 0 on some providers until played
+        size = int((snd.length or 0) * 44100 * 4) or os.path.getsize(self.path)
+        return snd, size
+
+    def _decode(self):
+        return self._load()
+
+    def _upload(self, decoded):
+        if self.obj is not None or self.missing:
+            return
+        if decoded is None:
+            self.get()
+            return
+        snd, size = decoded
+        if snd is not None:
+            # loop may have been set while the worker was loading
+            snd.loop = self._loop
+        self._store(snd, size)
+
+    def _unload(self):
+        if self.obj is not None:
+            self.obj.stop()
+            self.obj.unload()
+        self.obj = None
+
+    def play(self):
+        snd = self.get()
+        if snd is not None:
+            snd.play()
+
+    def stop(self):
+        # never load a sound just to stop it
+        if self.obj is not None:
+            self.obj.stop()
+
+    @property
+    def state(self):
+        return self.obj.state if self.obj is not None else 'stop'
+
+
+def _streaming_sound():
+    # SDL2's music channel streams from disk, so loading only opens the file;
+    # None when the SDL2 audio provider is not the one in use
+    try:
+        from kivy.core.audio.audio_sdl2 import MusicSDL2, SoundSDL2
+    except ImportError:
+        return None
+    return MusicSDL2 if SoundSDL2 in SoundLoader._classes else None
+
+
+class Music(Sound):
+    """A long background track. Decoding a whole track up front took a
+    third of a second, so with SDL2 it is streamed instead and its load is
+    cheap enough for the main thread. SDL2 streams one track at a time,
+    which is all a level plays."""
+
+    threaded = False
+
+    def _load(self):
+        cls = _streaming_sound()
+        if cls is None:
+            return super()._load()
+        snd = cls(source=self.path)
+        snd.loop = self._loop
+        return snd, os.path.getsize(self.path)
+
+
+class Texture(Asset):
+    threaded = True
+
+    def _load(self):
+        try:
+            # nocache: this cache owns the texture instead of Kivy's kv.image/kv.texture
+            tex = CoreImage(self.path, nocache=True).texture
+        except Exception:
+            return None, 0
+        return tex, tex.width * tex.height * 4
+
+    def _decode(self):
+        # worker thread: decode only, GL textures can only be made on the main thread
+        if self.path.startswith('atlas://'):
+            return None
+        try:
+            return ImageLoader.load(self.path, nocache=True)
+        except Exception:
+            return None
+
+    def _upload(self, image):
+        if self.obj is not None or self.missing:
+            return
+        if image is None:
+            self.get()
+            return
+        tex = image.texture
+        self._store(tex, tex.width * tex.height * 4 if tex else 0)
+
+
+class Prefetch:
+    """Progress of one AssetCache.prefetch call; ``bind`` runs a callback
+    (with the job) once everything in it is loaded."""
+
+    def __init__(self, assets):
+        self.assets = [a for a in assets if a.obj is None and a]
+        self.total = len(self.assets)
+        self.finished = 0
+        self.callbacks = []
+
+    @property
+    def done(self):
+        return self.finished >= self.total
+
+    @property
+    def progress(self):
+        return self.finished / self.total if self.total else 1.0
+
+    def bind(self, callback):
+        if self.done:
+            callback(self)
+        else:
+            self.callbacks.append(callback)
+
+    def _finish(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+class AssetCache:
+    """Sounds and textures by path, loaded lazily and evicted LRU once the
+    loaded total is over ``budget`` bytes. Referenced assets are never evicted."""
+
+    def __init__(self, budget=64 * 1024 * 1024):
+        self.budget = budget
+        self.assets = {}
+        self.lru = OrderedDict()
+        self.total = 0
+        self.loads = 0
+        self.evictions = 0
+        self.jobs = []
+        self._decoded = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._step_ev = None
+
+    def _get(self, cls, path):
+        asset = self.assets.get((cls, path))
+        if asset is None:
+            asset = self.assets[(cls, path)] = cls(self, path)
+        return asset
+
+    def sound(self, path):
+        return self._get(Sound, path)
+
+    def music(self, path):
+        return self._get(Music, path)
+
+    def texture(self, path):
+        return self._get(Texture, path)
+
+    def prefetch(self, assets):
+        """Load ``assets`` ahead of use without stalling a frame: images and
+        sounds are decoded on a worker thread, then handed over on the main
+        thread (textures made, music opened), one asset per frame."""
+        job = Prefetch(assets)
+        if job.done:
+            return job
+        with self._lock:
+            for asset in job.assets:
+                if asset.threaded and asset not in self._decoded:
+                    # None until the worker is done with it
+                    self._decoded[asset] = None
+                    self._queue.put(asset)
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._decode_loop, name='asset prefetch', daemon=True)
+            self._worker.start()
+        self.jobs.append(job)
+        if self._step_ev is None:
+            self._step_ev = Clock.schedule_interval(self._prefetch_step, 0)
+        return job
+
+    def _decode_loop(self):
+        while True:
+            asset = self._queue.get()
+            decoded = asset._decode()
+            with self._lock:
+                if asset.obj is not None or asset.missing or asset not in self._decoded:
+                    # loaded on the main thread in the meantime: drop the copy
+                    self._decoded.pop(asset, None)
+                else:
+                    # (decoded,) marks it done even if the decode failed
+                    self._decoded[asset] = (decoded,)
+
+    def _prefetch_step(self, dt):
+        if not self.jobs:
+            self._step_ev = None
+            return False
+        job = self.jobs[0]
+        asset = job.assets[job.finished]
+        with self._lock:
+            decoded = self._decoded.get(asset)
+            if asset in self._decoded and decoded is None:
+                if asset.obj is None and not asset.missing:
+                    return  # still on the worker
+                # loaded meanwhile; the worker drops its entry when it is done
+            else:
+                self._decoded.pop(asset, None)
+        asset._upload(decoded[0] if decoded else None)
+        job.finished += 1
+        if job.done:
+            self.jobs.pop(0)
+            job._finish()
+
+    def _loaded(self, asset):
+        if asset.obj is None:
+            return
+        self.loads += 1
+        self.total += asset.size
+        self.lru[asset] = None
+        self.evict()
+
+    def _touch(self, asset):
+        self.lru.move_to_end(asset)
+
+    def evict(self):
+        for asset in list(self.lru):
+            if self.total <= self.budget:
+                break
+            if asset.refs:
+                continue
+            del self.lru[asset]
+            self.total -= asset.size
+            asset._unload()
+            self.evictions += 1
+
+    def clear(self):
+        for asset in list(self.lru):
+            asset._unload()
+        self.lru.clear()
+        self.total = 0
+
+    def counters(self):
+        return {'assets': len(self.lru), 'asset MB': round(self.total / 2 ** 20, 1),
+                'loads': self.loads, 'evictions': self.evictions}
+
+
+ASSETS = AssetCache()
@@ -0,0 +1,161 @@
+import numpy as np
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Mesh, PopMatrix, PushMatrix, Translate
+from kivy.graphics.texture import Texture
+from kivy.properties import ColorProperty, ListProperty, NumericProperty, OptionProperty, StringProperty
+from kivy.uix.widget import Widget
+
+# rasterised up front for the small sizes (HUD, tables, buttons); the big
+# end-of-level sizes only get the glyphs they actually show
+PRELOAD = ''.join(chr(c) for c in range(32, 127)) + '°'
+PRELOAD_MAX_SIZE = 40
+# atlas pages wider than this wrap into more rows
+MAX_WIDTH = 2048
+
+
+class GlyphAtlas:
+    """Every glyph of one font at one size, rasterised once by the text
+    provider and packed into a single texture.
+
+    Press Start 2P is a monospaced pixel font, so a string rendered by
+    FreeType is exactly its glyphs side by side; BitmapLabel uses that to
+    draw text as one quad per glyph. A glyph the atlas has not seen yet
+    is rasterised on first use and the texture rebuilt; labels already
+    drawn keep the old texture until they next change.
+    """
+
+    def __init__(self, font_name, font_size):
+        self.font_name = font_name
+        self.font_size = font_size
+        self.pixels = {}
+        self.glyphs = {}
+        self.texture = None
+        self.rasters = 0
+        self.uploads = 0
+        if font_size <= PRELOAD_MAX_SIZE:
+            self.add(PRELOAD)
+
+    def add(self, text):
+        new = [c for c in set(text) if c not in self.pixels and c != '\n']
+        if not new:
+            return
+        for c in new:
+            label = CoreLabel(text=c, font_name=self.font_name, font_size=self.font_size)
+            label.refresh()
+            tex = label.texture
+            self.pixels[c] = np.frombuffer(tex.pixels, np.uint8).reshape(tex.height, tex.width, 4)
+            self.rasters += 1
+        self._pack()
+
+    def _pack(self):
+        cell_w = max(p.shape[1] for p in self.pixels.values())
+        cell_h = max(p.shape[0] for p in self.pixels.values())
+        cols = max(1, min(len(self.pixels), MAX_WIDTH // cell_w))
+        rows = -(-len(self.pixels) // cols)
+        width, height = cols * cell_w, rows * cell_h
+        page = np.zeros((height, width, 4), np.uint8)
+        self.glyphs = {}
+        for i, (c, glyph) in enumerate(sorted(self.pixels.items())):
+            h, w = glyph.shape[:2]
+            x, y = (i % cols) * cell_w, (i // cols) * cell_h
+            page[y:y + h, x:x + w] = glyph
+            # u0, u1, v of the glyph's first and last row, advance, height
+            self.glyphs[c] = (x / width, (x + w) / width, y / height, (y + h) / height, w, h)
+        texture = Texture.create(size=(width, height), colorfmt='rgba')
+        texture.blit_buffer(page.tobytes(), colorfmt='rgba', bufferfmt='ubyte')
+        self.texture = texture
+        self.uploads += 1
+
+    def layout(self, text, halign='center'):
+        """Quads for ``text`` with its bottom-left corner at (0, 0): a flat
+        vertex list (x, y, u, v per corner) and the text's (width, height)."""
+        self.add(text)
+        glyphs = self.glyphs
+        lines = text.split('\n')
+        # each line is as tall as its tallest glyph, like the text provider's own lines
+        metrics = [(sum(glyphs[c][4] for c in line),
+                    max((glyphs[c][5] for c in line), default=self.font_size)) for line in lines]
+        width = max(w for w, _ in metrics)
+        height = sum(h for _, h in metrics)
+        vertices = []
+        top = height
+        for line, (line_w, line_h) in zip(lines, metrics):
+            x = {'left': 0, 'right': width - line_w}.get(halign, (width - line_w) // 2)
+            bottom = top - line_h
+            for c in line:
+                u0, u1, v0, v1, w, h = glyphs[c]
+                # short glyphs sit on the bottom of the line, as in the rendered string;
+                # v0 is the glyph's top row
+                y = bottom
+                vertices += (x, y, u0, v1, x + w, y, u1, v1, x + w, y + h, u1, v0, x, y + h, u0, v0)
+                x += w
+            top = bottom
+        return vertices, (width, height if text else 0)
+
+
+_atlases = {}
+_indices = []
+
+
+def quad_indices(n):
+    # two triangles per quad, shared by every label
+    while len(_indices) < 6 * n:
+        k = 4 * (len(_indices) // 6)
+        _indices.extend((k, k + 1, k + 2, k + 2, k + 3, k))
+    return _indices[:6 * n]
+
+
+def glyph_atlas(font_name, font_size):
+    key = (font_name, int(font_size))
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = GlyphAtlas(*key)
+    return atlas
+
+
+class BitmapLabel(Widget):
+    """A Label for the Press Start 2P text, drawn from a GlyphAtlas.
+
+    Changing the text rewrites the vertices of one Mesh instead of
+    rasterising and uploading a new texture; moving the label only moves a
+    Translate. Like a Label without ``text_size``, the text is centred in the
+    widget and ``halign`` only aligns lines against each other.
+    ``texture_size`` is the size of the text, as on Label.
+    """
+
+    text = StringProperty('')
+    font_name = StringProperty('Press2P')
+    font_size = NumericProperty(15)
+    color = ColorProperty([1, 1, 1, 1])
+    halign = OptionProperty('center', options=['left', 'center', 'right', 'justify'])
+    texture_size = ListProperty([0, 0])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        with self.canvas:
+            PushMatrix()
+            self._offset = Translate()
+            self._color = Color(*self.color)
+            self._mesh = Mesh(mode='triangles', fmt=[(b'vPosition', 2, 'float'),
+                                                     (b'vTexCoords0', 2, 'float')])
+            PopMatrix()
+        self.bind(text=self._refresh, font_name=self._refresh, font_size=self._refresh,
+                  halign=self._refresh, pos=self._place, size=self._place, color=self._recolor)
+        self._refresh()
+
+    def _recolor(self, *args):
+        self._color.rgba = self.color
+
+    def _refresh(self, *args):
+        atlas = glyph_atlas(self.font_name, self.font_size)
+        vertices, size = atlas.layout(self.text, self.halign)
+        self._mesh.texture = atlas.texture
+        self._mesh.vertices = vertices
+        self._mesh.indices = quad_indices(len(vertices) // 16)
+        self.texture_size = size
+        self._place()
+
+    def _place(self, *args):
+        # where Label puts its texture; center_x can still be stale inside a pos callback
+        self._offset.xy = (int(self.x + self.width / 2. - self.texture_size[0] / 2.),
+                           int(self.y + self.height / 2. - self.texture_size[1] / 2.))
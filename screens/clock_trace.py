@@ -0,0 +1,93 @@
+import os
+import time
+from kivy.base import EventLoop
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.logger import Logger
+from simulation.tracing import TRACE
+
+TRACE_DIR = os.path.join("data", "traces")
+
+
+class _TracedCallback:
+    # stands in for a Clock callback; compares equal to it so Clock.unschedule still finds it
+    __slots__ = ('callback', 'name')
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.name = getattr(callback, '__qualname__', None) or repr(callback)
+
+    def __call__(self, *args):
+        if not TRACE.recording:
+            return self.callback(*args)
+        with TRACE.span(self.name, 'clock'):
+            return self.callback(*args)
+
+    def __eq__(self, other):
+        if isinstance(other, _TracedCallback):
+            other = other.callback
+        return self.callback == other
+
+    def __hash__(self):
+        return hash(self.callback)
+
+
+_installed = []
+_draw_start = [0.0]
+
+
+def _wrapping(method):
+    def schedule(callback, *args, **kwargs):
+        if not isinstance(callback, _TracedCallback):
+            callback = _TracedCallback(callback)
+        return method(callback, *args, **kwargs)
+    return schedule
+
+
+def _idle():
+    with TRACE.span('frame', 'frame'):
+        return type(EventLoop).idle(EventLoop)
+
+
+def _on_draw(*args):
+    _draw_start[0] = time.perf_counter()
+
+
+def _on_flip(*args):
+    TRACE.complete('draw', 'frame', _draw_start[0], time.perf_counter())
+
+
+def start_trace():
+    """Start recording every Clock callback, frame and draw from now on."""
+    if TRACE.recording:
+        return
+    # callbacks scheduled before this point run untraced; their inner phases still show up
+    for name in ('schedule_once', 'schedule_interval', 'create_trigger'):
+        setattr(Clock, name, _wrapping(getattr(Clock, name)))
+        _installed.append((Clock, name))
+    EventLoop.idle = _idle
+    _installed.append((EventLoop, 'idle'))
+    Window.bind(on_draw=_on_draw, on_flip=_on_flip)
+    TRACE.start()
+    Logger.info("Trace: recording")
+
+
+def stop_trace(directory=TRACE_DIR):
+    if not TRACE.recording:
+        return None
+    TRACE.stop()
+    Window.unbind(on_draw=_on_draw, on_flip=_on_flip)
+    # the patches are instance attributes shadowing the class methods
+    for obj, name in _installed:
+        delattr(obj, name)
+    _installed.clear()
+    path = TRACE.save(os.path.join(directory, f"trace-{int(time.time() * 1000)}.json"))
+    Logger.info(f"Trace: saved {len(TRACE.events)} events to {path}")
+    return path
+
+
+def toggle_trace():
+    if TRACE.recording:
+        return stop_trace()
+    start_trace()
+    return None
@@ -6,9 +6,11 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.image import Image
-from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.app import App
+from simulation.tracing import traced
+from .assets import ASSETS
+from .bitmap_font import BitmapLabel
 
 
 HOF_PATH = os.path.join("data", "hof.json")
@@ -31,12 +33,14 @@ def _load_hof():
     return []
 
 
+@traced
 def _save_hof(rows):
     _ensure_data_dir()
     with open(HOF_PATH, "w", encoding="utf-8") as f:
         json.dump(rows, f, ensure_ascii=False, indent=2)
 
 
+@traced
 def report_level_win(level_screen, level_id: str):
     app = App.get_running_app()
     # initialize tracking if needed
@@ -88,8 +92,8 @@ class HallOfFameScreen(Screen):
         root = FloatLayout()
 
         # background
+        self.bg_texture = ASSETS.texture('images/hof.png')
         self.bg = Image(
-            source='images/hof.png',
             allow_stretch=True,
             keep_ratio=False,
             size_hint=(1, 1),
@@ -137,7 +141,7 @@ class HallOfFameScreen(Screen):
 
     
     def _cell(self, text, header=False):
-        return Label(
+        return BitmapLabel(
             text=str(text),
             color=self.BLACK,
             font_name=self.FONT,
@@ -148,10 +152,15 @@ class HallOfFameScreen(Screen):
 
     
     def on_pre_enter(self, *args):
+        self.bg.texture = self.bg_texture.acquire().get()
         self.refresh()
 
     def on_pre_leave(self, *args):
         self._reset_player_context()
+
+    def on_leave(self, *args):
+        self.bg.texture = None
+        self.bg_texture.release()
     
     def refresh(self):
         rows = _load_hof()
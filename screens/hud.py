@@ -0,0 +1,33 @@
+from .bitmap_font import BitmapLabel
+
+# field: format, drawn left to right as one line
+FIELDS = (
+    ('angle', 'Angle: {}°'),
+    ('power', '   Power: {},'),
+    ('ammo', '   Ammo: {},'),
+    ('shots', '   Shots: {}'),
+)
+
+
+class InfoLine(BitmapLabel):
+    """The angle / power / ammo / shots line of a level's HUD.
+
+    Replaces a Label whose text was rebuilt every frame. The line is only
+    re-laid out when one of the fields changes, and as a BitmapLabel that
+    is a vertex update rather than a new text texture, so a frame where
+    nothing changed touches no text at all.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('font_size', 20)
+        super().__init__(**kwargs)
+        self.values = {}
+        # shown by the F3 overlay
+        self.relayouts = 0
+
+    def show(self, **values):
+        if all(self.values.get(name) == value for name, value in values.items()):
+            return
+        self.values.update(values)
+        self.text = ''.join(fmt.format(self.values.get(name, '')) for name, fmt in FIELDS)
+        self.relayouts += 1
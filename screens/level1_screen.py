@@ -1,142 +1,81 @@
-import math
-import random
-from kivy.uix.screenmanager import Screen
 from kivy.uix.widget import Widget
 from kivy.graphics import Rectangle, Color, Rotate, PushMatrix, PopMatrix
 from kivy.clock import Clock
-from kivy.core.audio import SoundLoader
 from kivy.uix.button import Button
 from kivy.uix.modalview import ModalView
 from kivy.uix.floatlayout import FloatLayout
 from kivy.core.window import Window
 from kivy.properties import NumericProperty
-from kivy.uix.label import Label
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.image import Image
-from physics import get_initial_velocity, GRAVITY
-from constants.screen_constants import BULLET_MASS, BULLET_RADIUS, BOMB_MASS, BOMB_RADIUS, BOMB_DRILL
+from physics import barrel_tip
+from simulation import bodies
+from simulation.layout import generate_rock_positions
+from simulation.tracing import traced
+from simulation.world import World
+from .assets import ASSETS
+from .bitmap_font import BitmapLabel
 from .hall_of_fame_screen import report_level_win
-
-
-class Perpetio(Image):
-    def __init__(self, x, y, **kwargs):
-        super().__init__(source='images/ostacolo_simpson2.png',
-                         size_hint=(None, None),
-                         size=(180, 180),
-                         pos=(x, y),
-                         **kwargs)
+from .hud import InfoLine
+from .level_screen import LevelScreen
+from .profile_overlay import ProfileOverlay
+from .projectiles import ProjectileManager
+from .sprite_batch import Sprite, SpriteBatch
+from .sprites import sprite
+from .static_layer import StaticLayer
+from .trajectory import TrajectoryPreview
+
+LEVEL = 1
+AMMO_CYCLE = ("bullet", "bomb")
+
+
+class Perpetio(Sprite):
+    def __init__(self, x, y):
+        super().__init__('ostacolo_simpson2', x, y, 180, 180)
         self.indestructible = True
+        self.body = bodies.Perpetio(x, y, *self.size)
 
 
-class RockBlock(Image):
-    def __init__(self, x, y, **kwargs):
-        super().__init__(source='images/ostacolo_simpson.png',
-                         size_hint=(None, None),
-                         size=(150, 150),
-                         pos=(x, y),
-                         **kwargs)
-        self.destroyed = False
-
-    def destroy(self):
-        if not self.destroyed:
-            self.destroyed = True
-            self.parent.remove_widget(self)
+class RockBlock(Sprite):
+    def __init__(self, body):
+        super().__init__('ostacolo_simpson', body.x, body.y, body.width, body.height)
+        self.body = body
 
-class RockField(Widget):
-    def __init__(self, **kwargs):
+class RockField(SpriteBatch):
+    def __init__(self, world, rng, **kwargs):
         super().__init__(**kwargs)
         self.size_hint = (None, None)
+        self.world = world
+        self.rng = rng
         self.blocks = []
         Window.bind(on_resize=self._on_resize)
 
     def generate_blocks(self, count=15, avoid_areas=None):
-        self.clear_widgets()
-        self.blocks.clear()
+        self.clear_blocks()
 
         screen_width, screen_height = Window.size
-        block_size = (150, 150)
-        max_attempts = 100
-
-        if avoid_areas is None:
-            avoid_areas = []
-
-        ground_limit = 150
-        avoid_areas.append((0, 0, screen_width, ground_limit))
-
-        attempts = 0
-        while len(self.blocks) < count and attempts < max_attempts:
-            attempts += 1
-            x = random.randint(0, screen_width - block_size[0])
-            y = random.randint(ground_limit, screen_height - block_size[1])
-
-            new_block_area = (x, y, block_size[0], block_size[1])
-
-            if any(self._intersects(new_block_area, (b.x, b.y, b.width, b.height)) for b in self.blocks):
-                continue
-            if any(self._intersects(new_block_area, area) for area in avoid_areas):
-                continue
-
-            block = RockBlock(x, y)
+        for x, y in generate_rock_positions(screen_width, screen_height, count, avoid_areas or (),
+                                            rng=self.rng):
+            body = bodies.RockBlock(x, y)
+            block = RockBlock(body)
+            self.world.add_rock(body)
             self.blocks.append(block)
-            self.add_widget(block)
-
-    def _intersects(self, a, b):
-        ax, ay, aw, ah = a
-        bx, by, bw, bh = b
-        return (ax < bx + bw and ax + aw > bx and
-                ay < by + bh and ay + ah > by)
+            self.add(block)
 
     def _on_resize(self, window, width, height):
         self.generate_blocks()
 
-    def check_collision(self, projectile):
-        px, py = projectile.center
-        for block in self.blocks[:]:
-            if block.collide_point(px, py):
+    def clear_blocks(self):
+        self.clear()
+        self.blocks.clear()
+        self.world.clear_rocks()
+
+    def remove_block(self, body):
+        for block in self.blocks:
+            if block.body is body:
                 self.blocks.remove(block)
-                self.remove_widget(block)
-                return True
-        return False
-
-class Bullet(Image):
-    def __init__(self, x, y, angle, speed, **kwargs):
-        super().__init__(source='images/bullet.png', size_hint=(None, None), size=(40, 40), pos=(x, y), **kwargs)
-        self.mass = BULLET_MASS
-        self.radius = BULLET_RADIUS
-        self.vx, self.vy = get_initial_velocity(angle, speed)
-        self.has_impacted = False
-
-    def move(self, dt=1/60):
-        if not self.has_impacted:
-            self.x += self.vx * dt * 60
-            self.y += self.vy * dt * 60
-            self.vy -= GRAVITY * dt * 60
-            if self.y < 0:
-                self.impact()
-
-    def impact(self):
-        self.has_impacted = True
-
-class Bomb(Image):
-    def __init__(self, x, y, angle, speed, **kwargs):
-        super().__init__(source='images/bomb.png', size_hint=(None, None), size=(40, 40), pos=(x, y), **kwargs)
-        self.mass = BOMB_MASS
-        self.radius = BOMB_RADIUS
-        self.drill = BOMB_DRILL
-        self.vx, self.vy = get_initial_velocity(angle, speed)
-        self.has_impacted = False
-
-    def move(self, dt=1/60):
-        if not self.has_impacted:
-            self.x += self.vx * dt * 60
-            self.y += self.vy * dt * 60
-            self.vy -= GRAVITY * dt * 60
-            if self.y < 0:
-                self.y -= self.drill
-                self.impact()
-
-    def impact(self):
-        self.has_impacted = True
+                self.remove(block)
+                return
 
 class Tank(Widget):
     angle = NumericProperty(0)
@@ -167,7 +106,7 @@ class Tank(Widget):
         center_x = x + self.body_width / 2
         center_y = y + self.body_height * 0.7
         with self.canvas:
-            self.tank_body = Rectangle(source='images/tank_simpson.png', pos=(x, y), size=(self.body_width, self.body_height))
+            self.tank_body = Rectangle(source=sprite('tank_simpson'), pos=(x, y), size=(self.body_width, self.body_height))
             PushMatrix()
             self.rotation = Rotate(angle=self.angle, origin=(center_x, center_y))
             Color(1, 0, 0, 1)
@@ -222,7 +161,8 @@ class HelpOverlay(ModalView):
             self._bg.size = root.size
         root.bind(pos=_upd_bg, size=_upd_bg)
 
-        self.help_img = Image(source=image_source, allow_stretch=True, keep_ratio=True,
+        self.help_texture = ASSETS.texture(image_source).acquire()
+        self.help_img = Image(texture=self.help_texture.get(), allow_stretch=True, keep_ratio=True,
                               size_hint=(0.8, 0.8), pos_hint={'center_x': 0.5, 'center_y': 0.53})
         root.add_widget(self.help_img)
 
@@ -235,39 +175,58 @@ class HelpOverlay(ModalView):
         self.add_widget(root)
 
     def on_dismiss(self):
+        self.help_img.texture = None
+        self.help_texture.release()
         if callable(self.on_close):
             self.on_close()
 
 
-class Level1Screen(Screen):
+class Level1Screen(LevelScreen):
+    level = LEVEL
+    ammo_cycle = AMMO_CYCLE
+    max_direct = 0.3
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.current_ammo = "bullet"
         self.level_completed = False
 
-        self.background = Image(source='images/bg_simpson.png', allow_stretch=True, keep_ratio=False,
+        # textures and sounds come from the shared cache, pinned only while the level is shown
+        self.bg_texture = ASSETS.texture('images/bg_simpson.png')
+        # background, rocks, fixed obstacles and target are drawn once into an fbo
+        self.static_layer = StaticLayer()
+        self.add_widget(self.static_layer)
+        self.background = Image(allow_stretch=True, keep_ratio=False,
                                 size=self.size, pos=self.pos)
         self.bind(size=self._resize_background, pos=self._resize_background)
-        self.add_widget(self.background)
+        self.static_layer.add_widget(self.background)
+
+        self.world = World(target_arm_distance=40, rng=self.rng.jitter)
+        self.perpetio = None
 
-        self.rock_field = RockField()
-        self.add_widget(self.rock_field)
+        self.rock_field = RockField(self.world, self.rng.layout)
+        self.static_layer.add_widget(self.rock_field)
 
-        self.target = Image(source='images/target_simpson.png', size_hint=(None, None), size=(300, 300))
-        self.add_widget(self.target)
+        self.target = Image(source=sprite('target_simpson'), size_hint=(None, None), size=(300, 300))
+        self.static_layer.add_widget(self.target)
+        self.obstacles = SpriteBatch()
+        self.static_layer.add_widget(self.obstacles)
 
         self.tank = Tank()
         self.add_widget(self.tank)
 
+        self.preview = TrajectoryPreview()
+        self.add_widget(self.preview)
+
         self.max_shots = 7
         self.remaining_shots = self.max_shots
         self._win_armed = False
         self._allow_win_sound = False
 
-        self.music = SoundLoader.load('sounds/simpson_sound.ogg')  
+        self.music = ASSETS.music('sounds/simpson_sound.ogg')  
 
-        self.sfx_win = SoundLoader.load('sounds/winner.mp3')
-        self.sfx_lose = SoundLoader.load('sounds/game over.mp3')       
+        self.sfx_win = ASSETS.sound('sounds/winner.mp3')
+        self.sfx_lose = ASSETS.sound('sounds/game over.mp3')       
         if self.sfx_lose:
             self.sfx_lose.loop = False
         if self.sfx_win:
@@ -276,8 +235,8 @@ class Level1Screen(Screen):
 
       
 
-        self.sfx_shoot_bullet = SoundLoader.load('sounds/shot.mp3')
-        self.sfx_shoot_bomb   = SoundLoader.load('sounds/bomb.mp3')
+        self.sfx_shoot_bullet = ASSETS.sound('sounds/shot.mp3')
+        self.sfx_shoot_bomb   = ASSETS.sound('sounds/bomb.mp3')
         for s in (self.sfx_shoot_bullet, self.sfx_shoot_bomb):
             if s: s.loop = False
         
@@ -287,13 +246,16 @@ class Level1Screen(Screen):
             self.hud_bg = Rectangle(pos=self.hud.pos, size=self.hud.size)
         self.hud.bind(pos=self._update_hud_bg, size=self._update_hud_bg)
 
-        self.info_label = Label(text='Angle: 90°   Power: 15   Ammo: BULLET', font_size=20, 
-                                color=(1, 1, 1, 1), 
-                                font_name="Press2P", 
-                                size_hint=(1, 1))
+        self.info_label = InfoLine(size_hint=(1, 1))
         self.hud.add_widget(self.info_label)
         self.add_widget(self.hud)
 
+        self.projectiles = ProjectileManager(self, self.world)
+        self.profile_overlay = ProfileOverlay(self.world.profiler, counters=self.overlay_counters)
+        self.add_widget(self.profile_overlay)
+
+        self._build_effects()
+
         # help button in HUD
         self.help_btn = Button(text='Help', size_hint=(None, None), 
                                size=(120, 40), font_name="Press2P", 
@@ -301,11 +263,29 @@ class Level1Screen(Screen):
         self.help_btn.bind(on_release=self.open_help)
         self.hud.add_widget(self.help_btn)
 
-        self.projectiles = []
         self.target_hit = False
 
         self.bind(size=self._resize_elements)
         
+    def _build_effects(self):
+        # made once and reused by every win and loss, so ending a level builds no widgets
+        self.explosion = Image(source=sprite('explosion'), size_hint=(None, None))
+        self.winner_label = BitmapLabel(text='WINNER!', font_size=130, font_name='fonts/PressStart2P-Regular.ttf',
+                                  color=(227/255, 11/255, 92/255, 1), size_hint=(None, None))
+        self.next_lev_btn = Button(text='Next Level', font_size=16, font_name='Press2P',
+                                   size_hint=(None, None), size=(200, 50))
+        self.next_lev_btn.bind(on_release=self.go_to_level_select)
+        self.lose_label = BitmapLabel(text='GAME OVER!', font_size=130, font_name='fonts/PressStart2P-Regular.ttf',
+                                color=(0, 0, 0, 1), size_hint=(None, None))
+        self.try_again_btn = Button(text='Try Again', font_size=16, font_name='Press2P',
+                                    size_hint=(None, None), size=(200, 50))
+        self.try_again_btn.bind(on_release=self.reset_level)
+
+    def level_assets(self):
+        return (self.bg_texture, self.music, self.sfx_win, self.sfx_lose,
+                self.sfx_shoot_bullet, self.sfx_shoot_bomb)
+
+    @traced
     def _play_once(self, snd):
         if not snd:
             return
@@ -341,40 +321,51 @@ class Level1Screen(Screen):
     def _resize_elements(self, *args):
         self.hud.size = (self.width, 70)
         self.target.pos = (self.width - self.target.width - 50, 100)
+        self.world.resize(self.width, self.height)
+        self.world.set_target(*self.target.pos, *self.target.size)
+
+    @traced
+    def on_pre_enter(self):
+        self._acquire_assets()
+        # the layout is in place before the level slides in
+        self.setup_level()
 
+    @traced
     def on_enter(self):
         self._played_win = False
         self._reset_sfx_flags()
-        self.setup_level()
         self.start_loop()
         Window.bind(on_key_down=self._on_key_down, on_key_up=self._on_key_up) 
         if self.music:
             self.music.loop = True
             self.music.play()
 
-    def on_leave(self, *args):
-        try:
-            Window.unbind(on_key_down=self._on_key_down, on_key_up=self._on_key_up)
-        except Exception:
-            pass
-        self.stop_loop()
-        if self.music:
-            self.music.stop()
-            
+    @traced
     def setup_level(self):
         self.remaining_shots = self.max_shots
         self.current_ammo = "bullet"
         self.projectiles.clear()
         self.target_hit = False
         self._resize_elements()
+        self._start_layout()
+
+    def _clear_obstacles(self):
+        if self.perpetio is not None:
+            self.obstacles.remove(self.perpetio)
+            self.perpetio = None
+        self.rock_field.clear_blocks()
+        self.world.reset()
 
+    def _generate_obstacles(self):
+        self._clear_obstacles()
         tank_area = (self.tank.x, self.tank.y, self.tank.body_width, self.tank.body_height)
         target_area = (self.target.x, self.target.y, self.target.width, self.target.height)
         
         perpetio_x = self.width // 2 - 60  
         perpetio_y = self.tank.y           
         self.perpetio = Perpetio(perpetio_x, perpetio_y)
-        self.add_widget(self.perpetio)
+        self.obstacles.add(self.perpetio)
+        self.world.add_perpetio(self.perpetio.body)
         perpetio_area = (self.perpetio.x, self.perpetio.y, self.perpetio.width, self.perpetio.height)
 
         self.rock_field.generate_blocks(avoid_areas=[tank_area, target_area, perpetio_area])
@@ -383,26 +374,22 @@ class Level1Screen(Screen):
         self.hud_bg.pos = self.hud.pos
         self.hud_bg.size = self.hud.size
 
-    def check_collision(self, projectile, target):
-        px, py = projectile.center
-        tx, ty = target.center
-        tw, th = target.size
-        return (tx - tw / 2 < px < tx + tw / 2) and (ty - th / 2 < py < ty + th / 2)
-
+    @traced
     def explode_target(self):
         if self.level_completed:
             return
         self.level_completed = True
-        explosion = Image(source='images/explosion.png', size=self.target.size, pos=self.target.pos, size_hint=(None, None))
-        self.add_widget(explosion)
-        winner_label = Label(text='WINNER!', font_size=130, font_name='fonts/PressStart2P-Regular.ttf', 
-                             color=(227/255, 11/255, 92/255, 1), pos=(self.width / 2, self.height / 2 + 50), 
-                             size_hint=(None, None))
-        self.add_widget(winner_label)
+        self.explosion.size = self.target.size
+        self.explosion.pos = self.target.pos
+        self._show(self.explosion)
+        self.winner_label.pos = (self.width / 2, self.height / 2 + 50)
+        self._show(self.winner_label)
         self.target_hit = True
         if self.music:
             self.music.stop()
         report_level_win(self, "1")
+        # get the next screen ready while the win is on screen
+        self.manager.prepare('level2')
         if self.sfx_win and not self._played_win:
             try:
                 self.sfx_win.stop()  
@@ -412,17 +399,8 @@ class Level1Screen(Screen):
             self._played_win = True
 
         # next level button
-        next_lev_btn = Button(
-            text='Next Level',
-            font_size=16,
-            font_name='Press2P',
-            size_hint=(None, None),
-            size=(200, 50),
-            pos=(self.width / 2 - 100, self.height / 2 - 30)
-        )
-        
-        next_lev_btn.bind(on_release=self.go_to_level_select)
-        self.add_widget(next_lev_btn)
+        self.next_lev_btn.pos = (self.width / 2 - 100, self.height / 2 - 30)
+        self._show(self.next_lev_btn)
 
         self.target_hit = True  # block other shots
 
@@ -431,55 +409,16 @@ class Level1Screen(Screen):
         level_select_screen.unlock_level2()
         self.manager.current = 'level_select'
 
-    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
-        if self.level_completed:
-            return
-        if key == 276:
-            self.tank.rotate_barrel('d')
-        elif key == 275:
-            self.tank.rotate_barrel('a')
-        elif key == 273:
-            self.tank.increase_power()
-        elif key == 274:
-            self.tank.decrease_power()
-        elif codepoint:
-            c = codepoint.lower()
-            if c in ['a', 'd']:
-                self.tank.move({c == 'a' and 'left' or 'right'})
-            elif c == 'w':
-                self.toggle_ammo()
-            elif c == ' ' and not self.target_hit:
-                self.fire_projectile()
-
-    def _on_key_up(self, window, key, scancode):
-        pass
-
-    def toggle_ammo(self):
-        self.current_ammo = "bomb" if self.current_ammo == "bullet" else "bullet"
-
     def fire_projectile(self):
         if self.remaining_shots <= 0 or self.target_hit:
             return
         tank = self.tank
-        center_x = tank.x + tank.body_width / 2
-        center_y = tank.y + tank.body_height * 0.7
-        angle_rad = math.radians(-tank.angle )
-        offset_x = math.sin(angle_rad) * tank.barrel_height
-        offset_y = math.cos(angle_rad) * tank.barrel_height
-        bullet_x = center_x + offset_x - 15
-        bullet_y = center_y + offset_y - 15
-        speed = tank.projectile_speed
-
-        if self.current_ammo == "bullet":
-            p = Bullet(x=bullet_x, y=bullet_y, angle=tank.angle, speed=speed)
-        else:
-            p = Bomb(x=bullet_x, y=bullet_y, angle=tank.angle, speed=speed)
-        p._travel = 0.0 
-        p._age_frames = 0
-        p._hit_frames = 0
+        tip_x, tip_y = barrel_tip(tank.x, tank.y, tank.body_width, tank.body_height,
+                                  tank.barrel_height, tank.angle)
+        body = self.world.spawn_shell(self.current_ammo, tip_x - 15, tip_y - 15,
+                                      tank.angle, tank.projectile_speed)
 
-        self.projectiles.append(p)
-        self.add_widget(p)
+        self.projectiles.add_shell(body)
 
         if self.current_ammo == "bullet":
             if self.sfx_shoot_bullet: self._play_once(self.sfx_shoot_bullet)
@@ -488,26 +427,18 @@ class Level1Screen(Screen):
 
         self.remaining_shots -= 1
 
-    def start_loop(self):
-        if not hasattr(self, '_upd_ev') or self._upd_ev is None:
-            self._upd_ev = Clock.schedule_interval(self.update, 1.0 / 60.0)
-    
-    def stop_loop(self):
-        if hasattr(self, '_upd_ev') and self._upd_ev is not None:
-            self._upd_ev.cancel()
-            self._upd_ev = None
-
+    @traced
     def reset_level(self, *args):
         self.stop_loop()
         if hasattr(self, 'sfx_win') and self.sfx_win:
             self.sfx_win.stop()
 
         self.clear_widgets()
-        self.add_widget(self.background)
-        self.add_widget(self.rock_field)
-        self.add_widget(self.target)
+        self.add_widget(self.static_layer)
         self.add_widget(self.tank)
+        self.add_widget(self.preview)
         self.add_widget(self.hud)
+        self.add_widget(self.profile_overlay)
         self.setup_level()
         self._level_ready = False
         Clock.schedule_once(lambda dt: setattr(self, "_level_ready", True), 0)
@@ -516,74 +447,16 @@ class Level1Screen(Screen):
             self.music.play()
 
 
-    def update(self, dt):
-        to_remove = []
-        for p in self.projectiles:
-            prev_cx, prev_cy = p.center
-            p.move()
-            step = math.hypot(p.center_x - prev_cx, p.center_y - prev_cy)
-
-            p._travel = getattr(p, "_travel", 0.0) + step
-            p._age_frames = getattr(p, "_age_frames", 0) + 1
-
-            # check collision with rock blocks
-            if self.rock_field.check_collision(p):
-                self.remove_widget(p)
-                to_remove.append(p)
-                continue
-
-            if p._travel >= 40 and self.check_collision(p, self.target):
-                self.explode_target()
-                self.remove_widget(p)
-                to_remove.append(p)
-                break
-
-            # check collision with perpetio
-            if hasattr(self, "perpetio") and self.perpetio.collide_point(*p.center):
-                self.remove_widget(p)
-                to_remove.append(p)
-                continue
-
-            # remove if out of bounds
-            if getattr(p, 'has_impacted', False):
-                self.remove_widget(p)
-                to_remove.append(p)
-
-        for p in to_remove:
-            if p in self.projectiles:
-                self.projectiles.remove(p)
-
-        angle = int(self.tank.angle - 270)
-        speed = int(self.tank.projectile_speed)
-        ammo = "BOMB" if self.current_ammo == "bomb" else "BULLET"
-        self.info_label.text = f"Angle: {angle}°   Power: {speed},   Ammo: {ammo},   Shots: {self.remaining_shots}"
-        if self.remaining_shots <= 0 and not self.target_hit and not self.projectiles:
-            self.show_loss()
-
+    @traced
     def show_loss(self):
-        lose_label = Label(
-            text='GAME OVER!',
-            font_size=130,
-            font_name= 'fonts/PressStart2P-Regular.ttf',
-            color=(0, 0, 0, 1),
-            pos=(self.width / 2, self.height / 2 + 50),
-            size_hint=(None, None)
-        )
-        self.add_widget(lose_label)
+        self.lose_label.pos = (self.width / 2, self.height / 2 + 50)
+        self._show(self.lose_label)
         if self.music:
             self.music.stop()
         self._play_once(self.sfx_lose)
 
         # try again button
-        try_again_btn = Button(
-            text='Try Again',
-            font_size=16,
-            font_name='Press2P',
-            size_hint=(None, None),
-            size=(200, 50),
-            pos=(self.width / 2 - 100, self.height / 2 - 30)
-        )
-        try_again_btn.bind(on_release=self.reset_level)
-        self.add_widget(try_again_btn)
+        self.try_again_btn.pos = (self.width / 2 - 100, self.height / 2 - 30)
+        self._show(self.try_again_btn)
 
         self.target_hit = True 
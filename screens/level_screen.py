@@ -0,0 +1,301 @@
+import os
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.uix.screenmanager import Screen
+from simulation.loop import FixedStepLoop
+from simulation.replay import ReplayPlayer, ReplayRecorder, start_state
+from simulation.rng import LevelRng
+from simulation.solver import LayoutCheck
+from simulation.tracing import traced
+from simulation.world import REMOVAL_EVENTS
+from .clock_trace import toggle_trace
+
+# how many of the seed's layouts to try before settling for one the analyzer rejected
+LAYOUT_ATTEMPTS = 5
+# TOONTANKS_REPLAYS=1 saves every attempt to data/replays; otherwise inputs are only kept in memory
+REPLAY_DIR = os.path.join("data", "replays") if os.environ.get('TOONTANKS_REPLAYS') else None
+
+
+class LevelScreen(Screen):
+    """What every level screen shares: the seeded rng, the fixed-step loop,
+    input recording and replay, the layout check and the level's assets.
+
+    A level sets ``level`` and ``ammo_cycle``, makes ``self.world`` (from
+    ``self.rng``) after calling ``__init__`` here, and provides the widgets
+    used below (``tank``, ``preview``, ``rock_field``, ``info_label``,
+    ``profile_overlay``, ``background``, ``bg_texture``). It places its own
+    obstacles in :meth:`_generate_obstacles` (and takes them away in
+    :meth:`_clear_obstacles`) and lists what it pins in :meth:`level_assets`.
+    """
+
+    level = None
+    ammo_cycle = ("bullet", "bomb")
+    # share of the analyzer's direct shots above which a layout is too easy
+    max_direct = 0.15
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # a fixed seed replays the same level; None picks a new one every time
+        self.seed = None
+        self.rng = LevelRng()
+        self.loop = FixedStepLoop(self._tick)
+        self._upd_ev = None
+        # every attempt is recorded; set pending_replay to play one back on the next start
+        self.recorder = None
+        self.replay_player = None
+        self.pending_replay = None
+        self.replay_dir = REPLAY_DIR
+        # layouts are checked before they are shown; see prepare_layout
+        self.layout_check = LayoutCheck()
+        self.layout_attempts = 1
+        self.layout_held = False
+        self._prepared = None
+
+    def level_assets(self):
+        return ()
+
+    def _acquire_assets(self):
+        for asset in self.level_assets():
+            asset.acquire()
+        self.background.texture = self.bg_texture.get()
+
+    def _release_assets(self):
+        self.background.texture = None
+        for asset in self.level_assets():
+            asset.release()
+
+    def _show(self, widget):
+        if widget.parent is None:
+            self.add_widget(widget)
+
+    def start_loop(self):
+        if self._upd_ev is None:
+            self.loop.reset()
+            self._upd_ev = Clock.schedule_interval(self.update, 1.0 / 60.0)
+
+    def stop_loop(self):
+        if self._upd_ev is not None:
+            self._upd_ev.cancel()
+            self._upd_ev = None
+
+    @traced
+    def on_leave(self, *args):
+        try:
+            Window.unbind(on_key_down=self._on_key_down, on_key_up=self._on_key_up)
+        except Exception:
+            pass
+        self.stop_loop()
+        self.layout_check.cancel()
+        self._prepared = None
+        self.layout_held = False
+        self.projectiles.clear()
+        self.preview.hide()
+        self.profile_overlay.hide()
+        self._save_replay()
+        if self.music:
+            self.music.stop()
+        self._release_assets()
+
+    def overlay_counters(self):
+        # for the F3 overlay; relayouts should only move when a hud field changes
+        counters = self.projectiles.counters()
+        counters['hud relayouts'] = self.info_label.relayouts
+        return counters
+
+    def _fit_manager(self):
+        if self.manager is not None:
+            # a screen fills its manager, but is only laid out once it is shown
+            self.size = self.manager.size
+        self._resize_elements()
+
+    def _layout_conditions(self):
+        # a prepared layout only fits the screen and tank it was generated for
+        return (self.seed, tuple(Window.size), tuple(self.size), tuple(self.tank.pos))
+
+    def _layout(self):
+        tank = self.tank
+        return self.world.layout((tank.x, tank.y, tank.body_width, tank.body_height, tank.barrel_height),
+                                 self.ammo_cycle)
+
+    def prepare_layout(self):
+        """Pick the seed of the next attempt and start checking the layouts it
+        can give, so the level opens on the first playable one. Called while
+        the level is not on screen, e.g. from ScreenManagement.prefetch."""
+        self._fit_manager()
+        conditions = self._layout_conditions()
+        if self._prepared is not None and self._prepared[0] == conditions:
+            return
+        self.rng.reseed(self.seed)
+        layouts = []
+        for _ in range(LAYOUT_ATTEMPTS):
+            self._generate_obstacles()
+            layouts.append(self._layout())
+        self._clear_obstacles()
+        self._prepared = [conditions, self.rng.seed, None]
+        self.layout_check.submit(layouts, self.max_shots, max_direct=self.max_direct)
+
+    def layout_ready(self, wait=False):
+        prepared = self._prepared
+        if prepared is None or prepared[0] != self._layout_conditions():
+            return False
+        if prepared[2] is None:
+            prepared[2] = self.layout_check.wait() if wait else self.layout_check.poll()
+        return prepared[2] is not None
+
+    def _start_layout(self):
+        replay = self.pending_replay
+        if replay is not None:
+            self._fit_manager()
+            self.rng.reseed(replay.seed)
+            self._restore_tank(replay)
+            # a replay says which of the seed's layouts it was played on
+            self._build_layout(replay.start.get('attempts', 1))
+            self._start_recording()
+            return
+        self.prepare_layout()
+        # nothing of the level is shown or playable until its layout is checked; see update
+        self._clear_obstacles()
+        self.layout_held = True
+        self._reveal_layout()
+
+    def _reveal_layout(self, wait=False):
+        if not self.layout_held or not self.layout_ready(wait):
+            return
+        _, seed, attempts = self._prepared
+        # the next attempt gets a new seed
+        self._prepared = None
+        self.layout_held = False
+        self.rng.reseed(seed)
+        self._build_layout(attempts)
+        self._start_recording()
+
+    def _generate_obstacles(self):
+        raise NotImplementedError
+
+    def _clear_obstacles(self):
+        raise NotImplementedError
+
+    def _build_layout(self, attempts):
+        # the seed's layouts are generated in order and the last one is kept,
+        # so the same seed and count always give the same level
+        self.rng.reseed(self.rng.seed)
+        for _ in range(attempts):
+            self._generate_obstacles()
+        self.layout_attempts = attempts
+
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        if key == 284:
+            # F3: frame time per phase
+            self.profile_overlay.toggle()
+            return
+        if key == 285:
+            # F4: start/stop recording a trace to data/traces
+            toggle_trace()
+            return
+        if self.level_completed or self.layout_held:
+            return
+        if self.replay_player is not None and not self.replay_player.done:
+            return
+        if key == 276:
+            self.apply_input('rotate', 'd')
+        elif key == 275:
+            self.apply_input('rotate', 'a')
+        elif key == 273:
+            self.apply_input('power', 1)
+        elif key == 274:
+            self.apply_input('power', -1)
+        elif codepoint:
+            c = codepoint.lower()
+            if c in ['a', 'd']:
+                self.apply_input('move', c == 'a' and 'left' or 'right')
+            elif c == 'w':
+                self.apply_input('ammo')
+            elif c == 'p':
+                self.preview.toggle()
+            elif c == ' ' and not self.target_hit:
+                self.apply_input('fire')
+        self.preview.request(self.world, self.tank, self.current_ammo)
+
+    def _on_key_up(self, window, key, scancode):
+        pass
+
+    def apply_input(self, action, arg=None):
+        if self.recorder is not None:
+            self.recorder.record(self.world.ticks, action, arg)
+        if action == 'rotate':
+            self.tank.rotate_barrel(arg)
+        elif action == 'power':
+            if arg > 0:
+                self.tank.increase_power()
+            else:
+                self.tank.decrease_power()
+        elif action == 'move':
+            self.tank.move({arg})
+        elif action == 'ammo':
+            self.toggle_ammo()
+        elif action == 'fire':
+            self.fire_projectile()
+
+    def toggle_ammo(self):
+        ammo_types = self.ammo_cycle
+        current_index = ammo_types.index(self.current_ammo)
+        self.current_ammo = ammo_types[(current_index + 1) % len(ammo_types)]
+
+    def _restore_tank(self, replay):
+        # before the layout is generated, since rocks are placed around the tank
+        if replay is not None:
+            tank = replay.start['tank']
+            self.tank.pos = (tank['x'], tank['y'])
+            self.tank.angle = tank['angle']
+            self.tank.projectile_speed = tank['power']
+
+    @traced
+    def _start_recording(self):
+        self._save_replay()
+        replay, self.pending_replay = self.pending_replay, None
+        self.replay_player = None
+        if replay is not None:
+            self.current_ammo = replay.start['ammo']
+            self.replay_player = ReplayPlayer(replay)
+        start = start_state(self.world, self.tank, self.current_ammo, self.ammo_cycle, self.remaining_shots,
+                            self.layout_attempts)
+        self.recorder = ReplayRecorder(self.level, self.rng.seed, start)
+
+    @traced
+    def _save_replay(self):
+        if self.recorder is not None and self.recorder.events and self.replay_dir:
+            self.recorder.save(self.replay_dir)
+        self.recorder = None
+
+    def _tick(self, dt):
+        if self.replay_player is not None:
+            for action, arg in self.replay_player.due(self.world.ticks):
+                self.apply_input(action, arg)
+        for ev in self.world.step(dt):
+            if ev.kind == 'rock':
+                self.rock_field.remove_block(ev.obstacle)
+                self.preview.request(self.world, self.tank, self.current_ammo)
+            elif ev.kind == 'target':
+                self.explode_target()
+            if ev.kind in REMOVAL_EVENTS:
+                self.projectiles.remove(ev.projectile.id)
+
+    def _sync_obstacles(self, alpha):
+        pass
+
+    def update(self, dt):
+        self._reveal_layout()
+        prof = self.world.profiler
+        with prof.phase('events'):
+            alpha = self.loop.advance(dt)
+        with prof.phase('sprites'):
+            self._sync_obstacles(alpha)
+            self.projectiles.sync(alpha)
+            self.preview.publish()
+        with prof.phase('hud'):
+            angle = int(self.tank.angle - 270)
+            speed = int(self.tank.projectile_speed)
+            self.info_label.show(angle=angle, power=speed, ammo=self.current_ammo.upper(),
+                                 shots=self.remaining_shots)
+        if self.remaining_shots <= 0 and not self.target_hit and not self.projectiles:
+            self.show_loss()
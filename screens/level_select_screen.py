@@ -1,7 +1,10 @@
+from kivy.clock import Clock
 from kivy.uix.screenmanager import Screen
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.image import Image
 from kivy.uix.button import Button
+from .assets import ASSETS
+from .bitmap_font import BitmapLabel
 
 class LevelSelectScreen(Screen):
     def __init__(self, **kwargs):
@@ -9,6 +12,9 @@ class LevelSelectScreen(Screen):
         self.level2_unlocked = False
         self.level3_unlocked = False
         self.levels_completed = {}
+        self._loading_ev = None
+        self.bg_texture = None
+        self._shown = False
         self.layout = FloatLayout()
         self.build_ui()
         self.add_widget(self.layout)
@@ -23,9 +29,17 @@ class LevelSelectScreen(Screen):
             bg_image = 'images/Level 2.png'
         else:
             bg_image = 'images/Level 1.png'
-        bg = Image(source=bg_image,
-                   allow_stretch=True, keep_ratio=False,)
-        self.layout.add_widget(bg)
+        # only referenced while this screen is shown (on_pre_enter/on_leave)
+        bg_texture = ASSETS.texture(bg_image)
+        if self._shown:
+            # rebuilt while shown: hold the new background before letting go of the old one
+            bg_texture.acquire()
+            self.bg_texture.release()
+        self.bg_texture = bg_texture
+        self.bg = Image(allow_stretch=True, keep_ratio=False,)
+        if self._shown:
+            self.bg.texture = bg_texture.get()
+        self.layout.add_widget(self.bg)
 
         # level 1 button
         btn1 = Button(
@@ -74,14 +88,53 @@ class LevelSelectScreen(Screen):
             btn3.bind(on_release=self.go_to_level3)
         self.layout.add_widget(btn3)
 
+        # shown only if a level is picked before its assets have been prefetched
+        self.loading_label = BitmapLabel(text='', font_name='Press2P', font_size=20, color=(1, 1, 1, 1),
+                                   pos_hint={'center_x': 0.5, 'center_y': 0.1}, size_hint=(None, None))
+        self.layout.add_widget(self.loading_label)
+
+    def on_pre_enter(self, *args):
+        self._shown = True
+        self.bg.texture = self.bg_texture.acquire().get()
+
+    def on_leave(self, *args):
+        self._shown = False
+        self.bg.texture = None
+        self.bg_texture.release()
+
     def go_to_level1(self, instance):
-        self.manager.current = 'level1'
+        self._go('level1')
 
     def go_to_level2(self, instance):
-        self.manager.current = 'level2'
+        self._go('level2')
 
     def go_to_level3(self, instance):
-        self.manager.current = 'level3'
+        self._go('level3')
+
+    def _go(self, name):
+        if self._loading_ev is not None:
+            return
+        job = self.manager.prefetch(name)
+        level = self.manager.get_screen(name)
+        # the level is only shown once its assets are in and its layout is checked
+        if job.done and level.layout_ready():
+            self.manager.current = name
+            return
+        self._loading_ev = Clock.schedule_interval(lambda dt: self._show_progress(name, job, level), 0.1)
+        self._show_progress(name, job, level)
+
+    def _show_progress(self, name, job, level):
+        if job.done and level.layout_ready():
+            self._loaded(name)
+            return
+        self.loading_label.text = f"LOADING {int(job.progress * 100)}%"
+
+    def _loaded(self, name):
+        self._loading_ev.cancel()
+        self._loading_ev = None
+        self.loading_label.text = ''
+        if self.manager.current == self.name:
+            self.manager.current = name
 
     def unlock_level2(self):
         self.level2_unlocked = True
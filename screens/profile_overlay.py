@@ -0,0 +1,88 @@
+from time import perf_counter
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.uix.label import Label
+
+
+class ProfileOverlay(Label):
+    """Debug readout of where frame time goes, fed by the world's PhaseProfiler.
+
+    Shows the rolling average per phase and the breakdown of the worst frame
+    in the window. Kivy's draw is timed between the window's on_draw and
+    on_flip, which is also where a frame ends.
+    """
+
+    def __init__(self, profiler, counters=None, refresh_every=15, **kwargs):
+        kwargs.setdefault('font_name', 'Press2P')
+        kwargs.setdefault('font_size', 10)
+        kwargs.setdefault('size_hint', (None, None))
+        kwargs.setdefault('pos_hint', {'x': 0.01, 'top': 0.98})
+        super().__init__(halign='left', valign='top', **kwargs)
+        self.profiler = profiler
+        # optional callable returning {name: count}, shown under the timings
+        self.counters = counters
+        self.refresh_every = refresh_every
+        self.opacity = 0
+        self._frames = 0
+        self._draw_start = 0.0
+        self._frame_start = 0.0
+        self.bind(texture_size=self._fit)
+        with self.canvas.before:
+            Color(0, 0, 0, 0.6)
+            self.bg = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._update_bg, size=self._update_bg)
+
+    @property
+    def enabled(self):
+        return self.profiler.enabled
+
+    def toggle(self):
+        if self.enabled:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self):
+        self.profiler.enable()
+        self._frame_start = perf_counter()
+        Window.bind(on_draw=self._on_draw, on_flip=self._on_flip)
+        self.text = 'profiling...'
+        self.opacity = 1
+
+    def hide(self):
+        if self.enabled:
+            Window.unbind(on_draw=self._on_draw, on_flip=self._on_flip)
+        self.profiler.enable(False)
+        self.opacity = 0
+
+    def _fit(self, *args):
+        self.size = (self.texture_size[0] + 16, self.texture_size[1] + 12)
+
+    def _update_bg(self, *args):
+        self.bg.pos = self.pos
+        self.bg.size = self.size
+
+    def _on_draw(self, *args):
+        self._draw_start = perf_counter()
+
+    def _on_flip(self, *args):
+        now = perf_counter()
+        self.profiler.add('draw', now - self._draw_start)
+        self.profiler.end_frame()
+        self._frames += 1
+        if self._frames % self.refresh_every == 0:
+            fps = self.refresh_every / max(now - self._frame_start, 1e-6)
+            self._frame_start = now
+            self.text = self.report(fps)
+
+    def report(self, fps):
+        averages = self.profiler.averages()
+        worst_ms, worst = self.profiler.worst()
+        lines = [f"{fps:5.1f} fps   {sum(averages.values()):6.2f} ms/frame"]
+        for name, ms in sorted(averages.items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<12}{ms:7.3f}")
+        top = sorted(worst.items(), key=lambda item: -item[1])[:3]
+        lines.append(f"worst {worst_ms:.2f} ms: " + ', '.join(f"{name} {ms:.2f}" for name, ms in top))
+        if self.counters is not None:
+            lines.append('  '.join(f"{name} {count}" for name, count in self.counters().items()))
+        return '\n'.join(lines)
@@ -0,0 +1,105 @@
+from kivy.clock import Clock
+
+from .shell_batch import ShellBatch
+
+
+class ProjectileManager:
+    """The sprites of a level's live projectiles.
+
+    The world moves every projectile inside the level's one fixed-step loop;
+    this keeps exactly one sprite per live body on the screen, syncs them all
+    from the same loop and drops them on impact, reset and leave. Nothing
+    here schedules its own Clock callbacks.
+
+    Shells have no sprite of their own: :meth:`add_shell` hands them to one
+    ShellBatch that draws all of them from the world's shell store. Other
+    projectiles (lasers) are widgets; dropped ones go back to a per-class pool
+    and are handed out again by :meth:`acquire`, so after :meth:`preallocate`
+    firing builds no widgets. Sprite classes take an optional body and rebind
+    to a new one in ``reset(body)``.
+    """
+
+    def __init__(self, screen, world, max_pooled=32):
+        self.screen = screen
+        self.world = world
+        self.max_pooled = max_pooled
+        self.sprites = {}
+        self.pool = {}
+        self.shells = ShellBatch(world.shells)
+        self.shell_ids = set()
+        self.spawned = 0
+        self.removed = 0
+        self.created = 0
+
+    def __len__(self):
+        return len(self.sprites) + len(self.shell_ids)
+
+    def __bool__(self):
+        return bool(self.sprites or self.shell_ids)
+
+    def preallocate(self, counts):
+        for cls, count in counts.items():
+            free = self.pool.setdefault(cls, [])
+            while len(free) < count:
+                free.append(cls())
+                self.created += 1
+
+    def acquire(self, cls, body):
+        free = self.pool.get(cls)
+        if free:
+            sprite = free.pop()
+            sprite.reset(body)
+        else:
+            sprite = cls(body)
+            self.created += 1
+        self.add(sprite)
+        return sprite
+
+    def add(self, sprite):
+        self.sprites[sprite.body.id] = sprite
+        self.screen.add_widget(sprite)
+        self.spawned += 1
+
+    def add_shell(self, body):
+        self.shell_ids.add(body.id)
+        if self.shells.parent is None:
+            # on top, where the shell sprites used to be added
+            self.screen.add_widget(self.shells)
+        self.shells.sync()
+        self.spawned += 1
+
+    def remove(self, body_id):
+        if body_id in self.shell_ids:
+            # the world has dropped its row; the next sync leaves it out
+            self.shell_ids.discard(body_id)
+            self.removed += 1
+            return
+        sprite = self.sprites.pop(body_id, None)
+        if sprite is None:
+            return
+        if sprite.parent:
+            sprite.parent.remove_widget(sprite)
+        self.removed += 1
+        sprite.body = None
+        free = self.pool.setdefault(type(sprite), [])
+        if len(free) < self.max_pooled:
+            free.append(sprite)
+
+    def sync(self, alpha):
+        self.shells.sync(alpha)
+        for sprite in self.sprites.values():
+            sprite.sync(alpha)
+
+    def clear(self):
+        for body_id in list(self.sprites):
+            self.remove(body_id)
+        self.removed += len(self.shell_ids)
+        self.shell_ids.clear()
+        self.world.clear_projectiles()
+        self.shells.clear()
+
+    def counters(self):
+        # for the debug overlay: sprites and bodies should always match
+        return {'sprites': len(self), 'bodies': self.world.live_projectiles,
+                'spawned': self.spawned, 'removed': self.removed, 'created': self.created,
+                'clock events': len(Clock.get_events())}
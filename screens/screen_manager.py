@@ -1,23 +1,119 @@
+from importlib import import_module
+
+from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager
+from simulation.solver import get_analyzer
+from .assets import ASSETS
 from .start_screen import StartScreen
 
-from .hall_of_fame_screen import HallOfFameScreen
-from .level_select_screen import LevelSelectScreen
-from .level1_screen import Level1Screen
-from .level2_screen import Level2Screen
-from .level3_screen import Level3Screen
 
+# built on first use; the module is only imported then too
+SCREENS = {
+    'halloffame': 'screens.hall_of_fame_screen:HallOfFameScreen',
+    'level_select': 'screens.level_select_screen:LevelSelectScreen',
+    'level1': 'screens.level1_screen:Level1Screen',
+    'level2': 'screens.level2_screen:Level2Screen',
+    'level3': 'screens.level3_screen:Level3Screen',
+}
+LEVELS = ('level1', 'level2', 'level3')
 
 
 class ScreenManagement(ScreenManager):
-    def __init__(self, **kwargs):
+    """Only the start screen is built up front. The others are built the first
+    time something navigates to them or asks for them with get_screen, and the
+    screens the player most likely goes to next are built while a menu is shown,
+    with their sounds and backgrounds prefetched.
+
+    Levels that are not on screen are torn down again, oldest first, once more
+    than ``max_idle_levels`` of them are built; a completed level keeps its
+    screen because that is where its state lives.
+    """
+
+    def __init__(self, max_idle_levels=1, prebuild_delay=1.0, **kwargs):
         super().__init__(**kwargs)
+        self.factories = dict(SCREENS)
+        self.max_idle_levels = max_idle_levels
+        self.prebuild_delay = prebuild_delay
+        self.shown = []
+        self.requested = ()
+        self.built = 0
+        self.torn_down = 0
+        self._idle_ev = Clock.create_trigger(self._on_idle, prebuild_delay)
         self.add_widget(StartScreen(name='home'))
-       
-        
-        self.add_widget(HallOfFameScreen(name='halloffame'))
-        self.add_widget(LevelSelectScreen(name='level_select'))
-        self.add_widget(Level1Screen(name='level1'))
-        self.add_widget(Level2Screen(name='level2'))
-        self.add_widget(Level3Screen(name='level3'))
 
+    def build_screen(self, name):
+        module, cls = self.factories[name].split(':')
+        screen = getattr(import_module(module), cls)(name=name)
+        self.add_widget(screen)
+        self.built += 1
+        return screen
+
+    def get_screen(self, name):
+        if name in self.factories and not self.has_screen(name):
+            return self.build_screen(name)
+        return super().get_screen(name)
+
+    def on_current(self, instance, value):
+        super().on_current(instance, value)
+        if value in self.shown:
+            self.shown.remove(value)
+        self.shown.append(value)
+        self.requested = ()
+        # after the transition, so the new screen's first frames are not held up
+        self._idle_ev()
+
+    def prepare(self, *names):
+        """Build ``names`` and prefetch their assets on idle frames, e.g. from
+        a level's win screen for the level it unlocks."""
+        self.requested = names
+        self._idle_ev()
+
+    def prefetch(self, name):
+        """Start loading the assets of screen ``name`` (building it if it is
+        not built yet), and checking its next layout if it is a level, and
+        return the AssetCache.prefetch job."""
+        screen = self.get_screen(name)
+        if name in LEVELS:
+            # and the processes that check its generated layouts
+            get_analyzer().start()
+            if name != self.current:
+                screen.prepare_layout()
+        return ASSETS.prefetch(screen.level_assets() if hasattr(screen, 'level_assets') else ())
+
+    def likely_next(self, name):
+        if name == 'home':
+            return ('level_select', 'level1')
+        if name == 'level_select':
+            select = self.get_screen('level_select')
+            # furthest unlocked level first
+            unlocked = (select.level3_unlocked, select.level2_unlocked, True)
+            return tuple(name for name, ok in zip(LEVELS[::-1], unlocked) if ok)
+        # nothing from inside a level unless it asks with prepare(): building mid-game drops frames
+        return ()
+
+    def _on_idle(self, dt):
+        wanted = self.likely_next(self.current) + self.requested
+        self.trim(self.max_idle_levels, spare=wanted)
+        for name in wanted:
+            if not self.has_screen(name):
+                # one screen per frame
+                self.build_screen(name)
+                self._idle_ev()
+                return
+        for name in wanted:
+            self.prefetch(name)
+
+    def _discardable(self, screen):
+        return (screen.name in LEVELS and screen.parent is None
+                and not getattr(screen, 'level_completed', False)
+                and getattr(screen, 'pending_replay', None) is None)
+
+    def trim(self, keep=0, spare=()):
+        """Tear down idle levels, other than those in ``spare``, until at most
+        ``keep`` are built; also the thing to call when the platform reports low memory."""
+        idle = [s for s in self.screens if self._discardable(s) and s.name not in spare]
+        # least recently shown first; never shown (prebuilt) counts as oldest
+        idle.sort(key=lambda s: self.shown.index(s.name) if s.name in self.shown else -1)
+        for screen in idle[:max(0, len(idle) - keep)]:
+            self.remove_widget(screen)
+            self.torn_down += 1
@@ -0,0 +1,87 @@
+import numpy as np
+from kivy.graphics import Color, Mesh
+from kivy.uix.widget import Widget
+
+from simulation.store import KIND_NAMES, SHELL_SIZE
+from .sprite_batch import _texture
+
+# mesh indices are unsigned shorts: 65536 vertices, four per quad
+MAX_SHELLS = 65536 // 4
+
+# two triangles per quad, as in SpriteBatch
+_QUAD = np.array([0, 1, 2, 2, 3, 0], dtype=np.uint16)
+
+
+class _KindMesh:
+    # every live shell of one kind as one quad in one Mesh
+    def __init__(self, name):
+        tex = _texture(name)
+        # drawn like the old Image: scaled down to fit the shell's box, never up, centred
+        scale = min(1.0, SHELL_SIZE / tex.width, SHELL_SIZE / tex.height)
+        w, h = tex.width * scale, tex.height * scale
+        x0, y0 = (SHELL_SIZE - w) / 2, (SHELL_SIZE - h) / 2
+        self.corners = np.array([[x0, y0], [x0 + w, y0], [x0 + w, y0 + h], [x0, y0 + h]], dtype=np.float32)
+        self.uv = np.array(tex.tex_coords, dtype=np.float32).reshape(4, 2)
+        self.vertices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.uint16)
+        self.drawn = 0
+        self.mesh = Mesh(texture=tex, mode='triangles', fmt=[(b'vPosition', 2, 'float'),
+                                                             (b'vTexCoords0', 2, 'float')])
+
+    def _reserve(self, n):
+        if n <= len(self.vertices):
+            return
+        size = min(MAX_SHELLS, max(n, 2 * len(self.vertices), 16))
+        self.vertices = np.zeros((size, 4, 4), dtype=np.float32)
+        self.vertices[:, :, 2:] = self.uv
+        self.indices = (_QUAD + 4 * np.arange(size, dtype=np.uint16)[:, None]).ravel()
+
+    def write(self, xs, ys):
+        n = min(len(xs), MAX_SHELLS)
+        self._reserve(n)
+        quads = self.vertices[:n]
+        quads[:, :, 0] = xs[:n, None] + self.corners[:, 0]
+        quads[:, :, 1] = ys[:n, None] + self.corners[:, 1]
+        # Kivy cannot take an empty float view
+        self.mesh.vertices = quads.ravel() if n else []
+        if n != self.drawn:
+            self.mesh.indices = self.indices[:6 * n]
+            self.drawn = n
+
+
+class ShellBatch(Widget):
+    """Draws every live shell in a ProjectileStore, one Mesh per kind.
+
+    The quads are rebuilt from the store's position arrays once per frame in
+    :meth:`sync`, so there is no per-shell widget or Python loop and the cost
+    of a frame hardly depends on how many shells are in the air.
+    """
+
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+        self.kinds = {}
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            for code, name in KIND_NAMES.items():
+                self.kinds[code] = _KindMesh(name)
+                self.canvas.add(self.kinds[code].mesh)
+
+    def __len__(self):
+        return self.store.count
+
+    def sync(self, alpha=1.0):
+        store = self.store
+        n = store.count
+        px, py = store.prev_x[:n], store.prev_y[:n]
+        xs = px + (store.x[:n] - px) * alpha
+        ys = py + (store.y[:n] - py) * alpha
+        kind = store.kind[:n]
+        for code, batch in self.kinds.items():
+            mask = kind == code
+            batch.write(xs[mask], ys[mask])
+
+    def clear(self):
+        empty = np.zeros(0)
+        for batch in self.kinds.values():
+            batch.write(empty, empty)
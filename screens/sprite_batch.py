@@ -0,0 +1,164 @@
+import numpy as np
+from kivy.clock import Clock
+from kivy.core.image import Image as CoreImage
+from kivy.graphics import Color, Mesh
+from kivy.uix.widget import Widget
+
+from .sprites import sprite
+
+_textures = {}
+
+# two triangles per quad
+_QUAD = np.array([0, 1, 2, 2, 3, 0], dtype=np.uint16)
+
+
+def _texture(name):
+    tex = _textures.get(name)
+    if tex is None:
+        tex = _textures[name] = CoreImage(sprite(name)).texture
+    return tex
+
+
+class Sprite:
+    """An obstacle on screen as plain data: a sprite name, a box and usually
+    a body. It is drawn by the SpriteBatch it has been added to."""
+
+    def __init__(self, name, x, y, width, height):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.visible = True
+        self.batch = None
+        self.layer = None
+        self.texture = None
+        self.index = None
+
+    @property
+    def pos(self):
+        return (self.x, self.y)
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    def move(self, x, y):
+        self.x = x
+        self.y = y
+        if self.batch is not None:
+            self.batch.update(self)
+
+    def show(self, visible=True):
+        self.visible = visible
+        if self.batch is not None:
+            self.batch.update(self)
+
+    def hide(self):
+        self.show(False)
+
+
+class _MeshLayer:
+    # one Mesh of quads for every sprite that shares a texture (an atlas page).
+    # writes only go into the arrays; changed() schedules the one upload per frame
+    def __init__(self, texture, changed):
+        self.vertices = np.zeros(0, dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.uint16)
+        self.count = 0
+        self.drawn = 0
+        self.free = []
+        self.dirty = False
+        self.changed = changed
+        self.mesh = Mesh(texture=texture, mode='triangles', fmt=[(b'vPosition', 2, 'float'),
+                                                              (b'vTexCoords0', 2, 'float')])
+
+    def alloc(self):
+        if self.free:
+            return self.free.pop()
+        if 16 * self.count == len(self.vertices):
+            size = max(16, 2 * self.count)
+            vertices = np.zeros(16 * size, dtype=np.float32)
+            vertices[:len(self.vertices)] = self.vertices
+            self.vertices = vertices
+            self.indices = (_QUAD + 4 * np.arange(size, dtype=np.uint16)[:, None]).ravel()
+        self.count += 1
+        return self.count - 1
+
+    def write(self, index, quad):
+        self.vertices[16 * index:16 * index + 16] = quad
+        if not self.dirty:
+            self.dirty = True
+            self.changed()
+
+    def flush(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        n = self.count
+        # Kivy cannot take an empty float view
+        self.mesh.vertices = self.vertices[:16 * n] if n else []
+        if n != self.drawn:
+            self.mesh.indices = self.indices[:6 * n] if n else []
+            self.drawn = n
+
+    def release(self, index):
+        # a zero-area quad draws nothing; the slot is reused by the next sprite
+        self.write(index, [0.0] * 16)
+        self.free.append(index)
+
+
+class SpriteBatch(Widget):
+    """Draws any number of Sprites with one Mesh per texture. Adding, moving,
+    hiding and removing a sprite only rewrites its own four vertices; each
+    changed Mesh is uploaded once, just before the next frame is drawn."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.layers = {}
+        self.sprites = set()
+        self._flush_ev = Clock.create_trigger(self.flush, -1)
+        with self.canvas:
+            Color(1, 1, 1, 1)
+
+    def add(self, sprite):
+        tex = _texture(sprite.name)
+        layer = self.layers.get(tex.id)
+        if layer is None:
+            layer = self.layers[tex.id] = _MeshLayer(tex, self._flush_ev)
+            self.canvas.add(layer.mesh)
+        sprite.batch = self
+        sprite.layer = layer
+        sprite.texture = tex
+        sprite.index = layer.alloc()
+        self.sprites.add(sprite)
+        self.update(sprite)
+        return sprite
+
+    def remove(self, sprite):
+        if sprite.batch is not self:
+            return
+        sprite.layer.release(sprite.index)
+        sprite.batch = sprite.layer = sprite.index = None
+        self.sprites.discard(sprite)
+
+    def clear(self):
+        for sprite in list(self.sprites):
+            self.remove(sprite)
+
+    def flush(self, *args):
+        for layer in self.layers.values():
+            layer.flush()
+
+    def update(self, sprite):
+        if not sprite.visible:
+            sprite.layer.write(sprite.index, [0.0] * 16)
+            return
+        # drawn like an Image with the default fit_mode: scaled down to fit the box, never up, centred
+        tex = sprite.texture
+        scale = min(1.0, sprite.width / tex.width, sprite.height / tex.height)
+        w, h = tex.width * scale, tex.height * scale
+        x = sprite.x + (sprite.width - w) / 2
+        y = sprite.y + (sprite.height - h) / 2
+        u0, v0, u1, v1, u2, v2, u3, v3 = tex.tex_coords
+        sprite.layer.write(sprite.index, [x, y, u0, v0, x + w, y, u1, v1,
+                                          x + w, y + h, u2, v2, x, y + h, u3, v3])
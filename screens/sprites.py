@@ -0,0 +1,36 @@
+import os
+
+# packed by tools/build_atlas.py; until it has been run the plain files are used
+ATLAS = os.path.join("images", "atlas", "game")
+
+# name: (file under images/, size it is drawn at, 'fit' keeps the aspect ratio like Image does,
+# 'fill' stretches like a canvas Rectangle)
+SPRITES = {
+    'bullet': ('bullet.png', (40, 40), 'fit'),
+    'bomb': ('bomb.png', (40, 40), 'fit'),
+    'explosion': ('explosion.png', (300, 300), 'fit'),
+    'wormhole': ('wormhole.png', (120, 120), 'fit'),
+    'ostacolo_simpson': ('ostacolo_simpson.png', (150, 150), 'fit'),
+    'ostacolo_simpson2': ('ostacolo_simpson2.png', (180, 180), 'fit'),
+    'ostacolo_futurama': ('ostacolo_futurama.png', (150, 150), 'fit'),
+    'ostacolo_futurama2': ('ostacolo_futurama2.png', (150, 150), 'fit'),
+    'ostacolo_futurama3': ('ostacolo_futurama3.png', (150, 150), 'fit'),
+    'ostacolo_spongebob': ('ostacolo_spongebob.png', (150, 150), 'fit'),
+    'ostacolo_spongebob2': ('ostacolo_spongebob2.png', (150, 150), 'fit'),
+    'ostacolo_spongebob3': ('ostacolo_spongebob3.png', (150, 150), 'fit'),
+    'target_simpson': ('target_simpson.png', (300, 300), 'fit'),
+    'target_futurama': ('target_futurama.png', (300, 300), 'fit'),
+    'target_spongebob': ('target_spongebob.png', (170, 170), 'fit'),
+    'tank_simpson': ('tank_simpson.png', (150, 100), 'fill'),
+    'tank_futurama': ('tank_futurama.png', (150, 100), 'fill'),
+    'tank_spongebob': ('tank_spongebob.png', (150, 100), 'fill'),
+}
+
+_use_atlas = os.path.exists(ATLAS + ".atlas")
+
+
+def sprite(name):
+    """Image source for a sprite: its atlas region when the atlas is built, else the plain file."""
+    if _use_atlas:
+        return f"atlas://{ATLAS}/{name}"
+    return os.path.join("images", SPRITES[name][0])
@@ -8,18 +8,19 @@ from kivy.uix.button import Button
 from kivy.uix.popup import Popup
 from kivy.app import App
 from kivy.uix.floatlayout import FloatLayout
+from .assets import ASSETS
 
 class StartScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         layout = FloatLayout()
-        bg = Image(source='images/sfondo.png',
-                   allow_stretch=True,
-                   keep_ratio=False,
-                   size_hint=(1, 1),
-                   pos_hint={'x': 0, 'y': 0})
-        layout.add_widget(bg)
+        self.bg_texture = ASSETS.texture('images/sfondo.png')
+        self.bg = Image(allow_stretch=True,
+                        keep_ratio=False,
+                        size_hint=(1, 1),
+                        pos_hint={'x': 0, 'y': 0})
+        layout.add_widget(self.bg)
         
         ui_layout = BoxLayout(orientation='vertical', 
                               padding=20, spacing=15,
@@ -91,9 +92,14 @@ class StartScreen(Screen):
         self.add_widget(layout)
 
     def on_pre_enter(self, *args):
+        self.bg.texture = self.bg_texture.acquire().get()
         app = App.get_running_app()
         self.username_input.text = getattr(app, "player_name", "")
 
+    def on_leave(self, *args):
+        self.bg.texture = None
+        self.bg_texture.release()
+
     #  helpers
     def _username_exists_in_hof(self, name: str) -> bool:
         try:
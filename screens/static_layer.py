@@ -0,0 +1,49 @@
+from kivy.graphics import Canvas, ClearBuffers, ClearColor, Color, Fbo, Rectangle
+from kivy.uix.widget import Widget
+
+
+class StaticLayer(Widget):
+    """Holds the widgets of a level that do not move (background, rocks, fixed
+    obstacles, target) and draws them into an offscreen framebuffer.
+
+    Kivy only re-renders an Fbo when an instruction inside it has changed, so
+    the layer is redrawn when a rock is removed, a new layout is generated or
+    the window is resized; every other frame it is one textured quad.
+    Children are added to the fbo instead of the canvas, as in Kivy's
+    fbo_canvas example.
+    """
+
+    def __init__(self, **kwargs):
+        self.canvas = Canvas()
+        with self.canvas:
+            self.fbo = Fbo(size=(1, 1))
+            Color(1, 1, 1, 1)
+            self.fbo_rect = Rectangle(texture=self.fbo.texture)
+        with self.fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+        super().__init__(**kwargs)
+        self.bind(pos=self._update_rect, size=self._update_rect)
+
+    def add_widget(self, widget, *args, **kwargs):
+        canvas = self.canvas
+        self.canvas = self.fbo
+        try:
+            super().add_widget(widget, *args, **kwargs)
+        finally:
+            self.canvas = canvas
+
+    def remove_widget(self, widget, *args, **kwargs):
+        canvas = self.canvas
+        self.canvas = self.fbo
+        try:
+            super().remove_widget(widget, *args, **kwargs)
+        finally:
+            self.canvas = canvas
+
+    def _update_rect(self, *args):
+        # a new size means a new texture
+        self.fbo.size = self.size
+        self.fbo_rect.texture = self.fbo.texture
+        self.fbo_rect.pos = self.pos
+        self.fbo_rect.size = self.size
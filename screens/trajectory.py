@@ -0,0 +1,45 @@
+from kivy.uix.widget import Widget
+from kivy.graphics import Color, Point
+from physics import barrel_tip, laser_direction
+from simulation.preview import PreviewWorker, shell_path, laser_path
+
+
+class TrajectoryPreview(Widget):
+    """Dotted aim preview; the path itself is computed by a PreviewWorker."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.enabled = False
+        self.worker = PreviewWorker()
+        with self.canvas:
+            Color(1, 1, 1, 0.7)
+            self.dots = Point(points=[], pointsize=3)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if not self.enabled:
+            self.hide()
+
+    def request(self, world, tank, ammo):
+        if not self.enabled:
+            return
+        tip_x, tip_y = barrel_tip(tank.x, tank.y, tank.body_width, tank.body_height,
+                                  tank.barrel_height, tank.angle)
+        # the worker only ever sees a copy of the level
+        snapshot = world.snapshot()
+        if ammo == "laser":
+            dx, dy = laser_direction(tank.angle)
+            self.worker.submit(laser_path, snapshot, tip_x + dx * 2, tip_y + dy * 2, tank.angle)
+        else:
+            self.worker.submit(shell_path, snapshot, ammo, tip_x - 15, tip_y - 15,
+                               tank.angle, tank.projectile_speed)
+
+    def publish(self):
+        # called every frame; only touches the canvas when a new path is ready
+        points = self.worker.poll()
+        if points is not None and self.enabled:
+            self.dots.points = [c for point in points for c in point]
+
+    def hide(self):
+        self.worker.cancel()
+        self.dots.points = []
@@ -0,0 +1,110 @@
+import math
+import itertools
+from physics import laser_direction
+
+_ids = itertools.count(1)
+
+
+def next_id():
+    return next(_ids)
+
+
+class Box:
+    def __init__(self, x, y, width, height):
+        self.x = float(x)
+        self.y = float(y)
+        self.width = float(width)
+        self.height = float(height)
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+    @property
+    def top(self):
+        return self.y + self.height
+
+    @property
+    def center(self):
+        return self.x + self.width / 2, self.y + self.height / 2
+
+    @property
+    def area(self):
+        return (self.x, self.y, self.width, self.height)
+
+    def collide_point(self, px, py):
+        # same rule as Widget.collide_point, edges included
+        return self.x <= px <= self.right and self.y <= py <= self.top
+
+    def contains(self, px, py):
+        # strict test used for the target
+        return self.x < px < self.right and self.y < py < self.top
+
+
+class RockBlock(Box):
+    def __init__(self, x, y, width=150, height=150):
+        super().__init__(x, y, width, height)
+        self.destroyed = False
+
+
+class Perpetio(Box):
+    indestructible = True
+
+
+class MovingPerpetio(Perpetio):
+    def __init__(self, x, y, width=150, height=150, amp=0.0, freq=0.0, phase=0.0,
+                 floor=150, ceiling=None):
+        super().__init__(x, y, width, height)
+        self.base_y = float(y)
+        self.prev_y = float(y)
+        self.amp = float(amp)
+        self.freq = float(freq)
+        self.phase = float(phase)
+        self.floor = floor
+        self.ceiling = ceiling
+        self._t = 0.0
+
+    def lerp_y(self, alpha):
+        return self.prev_y + (self.y - self.prev_y) * alpha
+
+    def step(self, dt):
+        self.prev_y = self.y
+        self._t += dt
+        new_y = self.base_y + self.amp * math.sin(2 * math.pi * self.freq * self._t + self.phase)
+        if self.ceiling is not None:
+            new_y = min(self.ceiling, new_y)
+        self.y = max(self.floor, new_y)
+
+
+class Mirror(Box):
+    indestructible = True
+
+    def __init__(self, x, y, width=150, height=150, angle=45):
+        super().__init__(x, y, width, height)
+        self.angle = angle
+        # mirrors never move, so the reflecting segment and its normal are fixed
+        mx, my = self.center
+        cos_a, sin_a = laser_direction(angle)
+        half = self.width / 2
+        self.p1 = (mx - half * cos_a, my - half * sin_a)
+        self.p2 = (mx + half * cos_a, my + half * sin_a)
+        self.normal = (-sin_a, cos_a)
+
+    def segment(self):
+        return self.p1, self.p2
+
+    def reflect(self, dx, dy):
+        nx, ny = self.normal
+        dot = dx * nx + dy * ny
+        return dx - 2 * dot * nx, dy - 2 * dot * ny
+
+
+class Wormhole:
+    indestructible = True
+
+    def __init__(self, portal_a, portal_b, nudge=25, cooldown=6):
+        self.portal_a = portal_a
+        self.portal_b = portal_b
+        # security nudge to avoid immediate re-entry
+        self.nudge = nudge
+        self.cooldown = cooldown
@@ -0,0 +1,117 @@
+import math
+import numpy as np
+
+_OFFSET = 1 << 20
+
+
+def _key(ix, iy):
+    return (ix + _OFFSET) * (2 * _OFFSET) + (iy + _OFFSET)
+
+
+class UniformGrid:
+    """Spatial hash of obstacle slots keyed by fixed-size cells.
+
+    Obstacles are inserted once when a level is built and updated in place
+    when they move or disappear. Queries cost the number of cells touched,
+    not the number of obstacles in the level.
+    """
+
+    def __init__(self, cell_size=150):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.slot_cells = {}
+        self._packed = None
+
+    def __len__(self):
+        return len(self.slot_cells)
+
+    def _cell_range(self, x0, y0, x1, y1):
+        cs = self.cell_size
+        return (math.floor(x0 / cs), math.floor(y0 / cs),
+                math.floor(x1 / cs), math.floor(y1 / cs))
+
+    def _keys(self, box):
+        ix0, iy0, ix1, iy1 = self._cell_range(*box)
+        return tuple(_key(ix, iy) for ix in range(ix0, ix1 + 1) for iy in range(iy0, iy1 + 1))
+
+    def clear(self):
+        self.cells.clear()
+        self.slot_cells.clear()
+        self._packed = None
+
+    def insert(self, slot, box):
+        keys = self._keys(box)
+        for key in keys:
+            self.cells.setdefault(key, set()).add(slot)
+        self.slot_cells[slot] = keys
+        self._packed = None
+
+    def remove(self, slot):
+        for key in self.slot_cells.pop(slot, ()):
+            cell = self.cells[key]
+            cell.discard(slot)
+            if not cell:
+                del self.cells[key]
+        self._packed = None
+
+    def update(self, slot, box):
+        # most moves stay inside the same cells, which costs nothing
+        if self._keys(box) != self.slot_cells.get(slot):
+            self.remove(slot)
+            self.insert(slot, box)
+
+    def query(self, x0, y0, x1, y1):
+        found = set()
+        ix0, iy0, ix1, iy1 = self._cell_range(x0, y0, x1, y1)
+        for ix in range(ix0, ix1 + 1):
+            for iy in range(iy0, iy1 + 1):
+                found.update(self.cells.get(_key(ix, iy), ()))
+        return found
+
+    def query_point(self, x, y):
+        return self.query(x, y, x, y)
+
+    def _pack(self):
+        # sorted cell keys with CSR offsets into a flat slot array, rebuilt only after edits
+        if self._packed is None:
+            keys = sorted(self.cells)
+            counts = [len(self.cells[k]) for k in keys]
+            slots = [s for k in keys for s in sorted(self.cells[k])]
+            starts = np.zeros(len(keys) + 1, dtype=np.int64)
+            np.cumsum(counts, out=starts[1:])
+            self._packed = (np.array(keys, dtype=np.int64), starts, np.array(slots, dtype=np.int64))
+        return self._packed
+
+    def query_pairs(self, x0, y0, x1, y1):
+        """Vectorized query for many boxes; returns unique (box index, slot) pairs."""
+        keys, starts, slots = self._pack()
+        empty = np.zeros(0, dtype=np.int64)
+        if not len(keys) or not len(x0):
+            return empty, empty
+        cs = self.cell_size
+        ix0 = np.floor(x0 / cs).astype(np.int64)
+        iy0 = np.floor(y0 / cs).astype(np.int64)
+        nx = np.floor(x1 / cs).astype(np.int64) - ix0 + 1
+        ny = np.floor(y1 / cs).astype(np.int64) - iy0 + 1
+
+        # one entry per (box, cell touched)
+        counts = nx * ny
+        rows = np.repeat(np.arange(len(x0)), counts)
+        local = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell_keys = _key(ix0[rows] + local % nx[rows], iy0[rows] + local // nx[rows])
+
+        pos = np.searchsorted(keys, cell_keys)
+        pos[pos == len(keys)] = 0
+        occupied = keys[pos] == cell_keys
+        rows, pos = rows[occupied], pos[occupied]
+
+        # one entry per (box, slot in that cell)
+        counts = starts[pos + 1] - starts[pos]
+        rows = np.repeat(rows, counts)
+        local = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        found = slots[np.repeat(starts[pos], counts) + local]
+
+        # an obstacle spanning several touched cells shows up once per cell
+        span = int(slots.max()) + 1
+        pairs = np.unique(rows * span + found)
+        return pairs // span, pairs % span
@@ -0,0 +1,49 @@
+def segment_intersect(p1, p2, p3, p4):
+    def orient(a, b, c):
+        return (b[0]-a[0])*(c[1]-a[1]) - (b[1]-a[1])*(c[0]-a[0])
+    def on_seg(a, b, c):
+        return (min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and
+                min(a[1], b[1]) <= c[1] <= max(a[1], b[1]))
+    o1 = orient(p1, p2, p3)
+    o2 = orient(p1, p2, p4)
+    o3 = orient(p3, p4, p1)
+    o4 = orient(p3, p4, p2)
+
+    if o1 == 0 and on_seg(p1, p2, p3): return True
+    if o2 == 0 and on_seg(p1, p2, p4): return True
+    if o3 == 0 and on_seg(p3, p4, p1): return True
+    if o4 == 0 and on_seg(p3, p4, p2): return True
+    return (o1 > 0) != (o2 > 0) and (o3 > 0) != (o4 > 0)
+
+
+def ray_box(ox, oy, dx, dy, x0, y0, x1, y1):
+    # slab test, edges included; returns the entry distance along the ray or None
+    t_near, t_far = 0.0, float('inf')
+    for o, d, lo, hi in ((ox, dx, x0, x1), (oy, dy, y0, y1)):
+        if d == 0:
+            if o < lo or o > hi:
+                return None
+            continue
+        t1 = (lo - o) / d
+        t2 = (hi - o) / d
+        if t1 > t2:
+            t1, t2 = t2, t1
+        t_near = max(t_near, t1)
+        t_far = min(t_far, t2)
+        if t_near > t_far:
+            return None
+    return t_near
+
+
+def ray_segment(ox, oy, dx, dy, p1, p2):
+    # distance along the ray to the segment p1-p2, or None if it misses
+    ex, ey = p2[0] - p1[0], p2[1] - p1[1]
+    denom = dx * ey - dy * ex
+    if denom == 0:
+        return None
+    wx, wy = p1[0] - ox, p1[1] - oy
+    t = (wx * ey - wy * ex) / denom
+    u = (wx * dy - wy * dx) / denom
+    if t < 0 or u < 0 or u > 1:
+        return None
+    return t
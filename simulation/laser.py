@@ -0,0 +1,224 @@
+import math
+from collections import namedtuple
+from physics import laser_direction
+from constants.screen_constants import LASER_VEL, LASER_DIST
+from .bodies import next_id
+from .geometry import ray_box, ray_segment
+
+LASER_LENGTH = 250
+
+# one straight piece of the beam, d0/d1 are distances along the whole path
+BeamSegment = namedtuple('BeamSegment', 'x0 y0 x1 y1 d0 d1 angle')
+# something the tip reaches at `distance`; bounces and budget are the beam state right after it
+BeamEvent = namedtuple('BeamEvent', 'kind distance point obstacle angle bounces budget')
+
+TERMINAL_KINDS = ('rock', 'target', 'perpetio', 'impact')
+
+
+def _angle_of(dx, dy):
+    return (math.degrees(math.atan2(dy, dx)) + 270) % 360
+
+
+def trace_beam(world, x, y, angle, max_distance=LASER_DIST, max_bounces=3,
+               start_distance=0.0, bounces=0, ignore=None, rocks_crossed=None):
+    """Cast the beam through the level once and return its segments and events.
+
+    Mirrors reflect it about their precomputed normals (plus the world's
+    jitter), portals move it to the other side, and the first rock,
+    perpetio, target, screen edge or the end of the range stops it.
+
+    If ``rocks_crossed`` is a list the beam goes through rocks instead,
+    appending ``(distance, rock)`` for each one it enters.
+    """
+    crossed = set()
+    segments = []
+    events = []
+    dist = start_distance
+    budget = max_distance
+    dx, dy = laser_direction(angle)
+
+    while True:
+        reach = budget - dist
+        if reach <= 0:
+            events.append(BeamEvent('impact', dist, (x, y), None, angle, bounces, budget))
+            break
+        ex, ey = x + dx * reach, y + dy * reach
+
+        # nearest thing along this leg; the screen edges count as a stop
+        best_t, best_kind, best_ref = reach, 'impact', None
+        for t in ((-x / dx) if dx < 0 else None,
+                  (-y / dy) if dy < 0 else None,
+                  ((world.width - x) / dx) if dx > 0 else None):
+            if t is not None and 0 <= t < best_t:
+                best_t = t
+        for kind, ref in world.obstacles_near(min(x, ex), min(y, ey), max(x, ex), max(y, ey)):
+            if kind == 'mirror':
+                if ref is ignore:
+                    continue
+                t = ray_segment(x, y, dx, dy, ref.p1, ref.p2)
+            elif kind == 'portal':
+                box = ref[1]
+                if box is ignore:
+                    continue
+                t = ray_box(x, y, dx, dy, box.x, box.y, box.right, box.top)
+            elif kind == 'rock' and id(ref) in crossed:
+                continue
+            else:
+                t = ray_box(x, y, dx, dy, ref.x, ref.y, ref.right, ref.top)
+                if kind == 'target' and t is not None and dist + t < world.target_arm_distance:
+                    continue
+            if t is not None and t < best_t:
+                best_t, best_kind, best_ref = t, kind, ref
+
+        px, py = x + dx * best_t, y + dy * best_t
+        segments.append(BeamSegment(x, y, px, py, dist, dist + best_t, angle))
+        dist += best_t
+
+        if best_kind == 'mirror':
+            if bounces >= max_bounces:
+                # out of bounces: the mirror absorbs the beam
+                events.append(BeamEvent('impact', dist, (px, py), best_ref, angle, bounces, budget))
+                break
+            bounces += 1
+            budget *= 0.9
+            dx, dy = best_ref.reflect(dx, dy)
+            jitter = world.rng.uniform(-world.mirror_jitter, world.mirror_jitter)
+            angle = (_angle_of(dx, dy) + jitter) % 360
+            dx, dy = laser_direction(angle)
+            events.append(BeamEvent('reflect', dist, (px, py), best_ref, angle, bounces, budget))
+            x, y, ignore = px, py, best_ref
+            continue
+
+        if best_kind == 'rock' and rocks_crossed is not None:
+            rocks_crossed.append((dist, best_ref))
+            crossed.add(id(best_ref))
+            x, y = px, py
+            continue
+
+        if best_kind == 'portal':
+            wh, _, dst = best_ref
+            dst_x, dst_y = dst.center
+            x, y = dst_x + dx * wh.nudge, dst_y + dy * wh.nudge
+            events.append(BeamEvent('teleport', dist, (x, y), wh, angle, bounces, budget))
+            # don't fall straight back into the exit portal
+            ignore = dst
+            continue
+
+        events.append(BeamEvent(best_kind, dist, (px, py), best_ref, angle, bounces, budget))
+        break
+
+    return segments, events
+
+
+class Laser:
+    """A beam whose whole path is traced up front.
+
+    The path only changes when the level changes under it (a rock goes away,
+    a perpetio moves across it); then it is traced again from the current front.
+    """
+
+    kind = 'laser'
+
+    def __init__(self, x, y, angle, length=LASER_LENGTH, max_bounces=3, max_distance=LASER_DIST):
+        self.id = next_id()
+        self.origin = (float(x), float(y))
+        self.length = length
+        self.speed = LASER_VEL
+        self.max_bounces = max_bounces
+        self.has_impacted = False
+        # state of the leg the front is on
+        self.angle = angle
+        self.bounces = 0
+        # the front may run `length` further than the back used to
+        self.budget = max_distance + length
+        # distance of the back of the beam along its path, the front is `length` ahead
+        self.travel = 0.0
+        self.prev_travel = 0.0
+        self.age = 0
+        self.segments = []
+        self.pending = []
+        self.traced_at = -1
+
+    @property
+    def front(self):
+        return self.travel + self.length
+
+    def trace(self, world, start=0.0):
+        # (re)trace everything past `start`, keeping the path already covered
+        x, y = self.point_at(start) if self.segments else self.origin
+        segments, events = trace_beam(world, x, y, self.angle, self.budget, self.max_bounces,
+                                      start_distance=start, bounces=self.bounces)
+        kept = []
+        for seg in self.segments:
+            if seg.d0 >= start:
+                break
+            if seg.d1 > start:
+                seg = seg._replace(x1=x, y1=y, d1=start)
+            kept.append(seg)
+        self.segments = kept + segments
+        self.pending = events
+        self.traced_at = world.layout_version
+
+    def crosses(self, boxes):
+        # whether the path not yet reached by the front runs through any (x0, y0, x1, y1) box;
+        # edges are widened a pixel so a beam stopped on a box's edge counts
+        front = self.front
+        for seg in self.segments:
+            if seg.d1 <= front:
+                continue
+            dx, dy = seg.x1 - seg.x0, seg.y1 - seg.y0
+            for x0, y0, x1, y1 in boxes:
+                t = ray_box(seg.x0, seg.y0, dx, dy, x0 - 1, y0 - 1, x1 + 1, y1 + 1)
+                if t is not None and t <= 1:
+                    return True
+        return False
+
+    def passed(self, event):
+        self.angle = event.angle
+        self.bounces = event.bounces
+        self.budget = event.budget
+
+    def advance(self, dt):
+        self.prev_travel = self.travel
+        self.travel += self.speed * dt
+        self.age += 1
+
+    def point_at(self, distance):
+        for seg in self.segments:
+            if distance <= seg.d1:
+                k = (distance - seg.d0) / ((seg.d1 - seg.d0) or 1.0)
+                return seg.x0 + (seg.x1 - seg.x0) * k, seg.y0 + (seg.y1 - seg.y0) * k
+        if self.segments:
+            return self.segments[-1].x1, self.segments[-1].y1
+        return self.origin
+
+    @property
+    def center(self):
+        return self.point_at(self.travel)
+
+    def visible_segments(self, alpha=1.0):
+        # the part of the path between the back and the front, cut at every bounce
+        tail = self.prev_travel + (self.travel - self.prev_travel) * alpha
+        tip = tail + self.length
+        lines = []
+        for seg in self.segments:
+            if seg.d1 <= tail or seg.d0 >= tip:
+                continue
+            span = (seg.d1 - seg.d0) or 1.0
+            k0 = (max(tail, seg.d0) - seg.d0) / span
+            k1 = (min(tip, seg.d1) - seg.d0) / span
+            lines.append((seg.x0 + (seg.x1 - seg.x0) * k0, seg.y0 + (seg.y1 - seg.y0) * k0,
+                          seg.x0 + (seg.x1 - seg.x0) * k1, seg.y0 + (seg.y1 - seg.y0) * k1))
+        return lines
+
+    def visible_paths(self, alpha=1.0):
+        # visible_segments joined into flat polylines [x0, y0, x1, y1, ...];
+        # a bounce continues the current polyline, a portal jump starts a new one
+        paths = []
+        for x0, y0, x1, y1 in self.visible_segments(alpha):
+            path = paths[-1] if paths else None
+            if path is not None and abs(path[-2] - x0) < 1e-6 and abs(path[-1] - y0) < 1e-6:
+                path.extend((x1, y1))
+            else:
+                paths.append([x0, y0, x1, y1])
+        return paths
@@ -0,0 +1,67 @@
+import math
+import random
+from collections import namedtuple
+
+# everything needed to rebuild a level away from the screen; bodies are copies
+# tank is (x, y, body_width, body_height, barrel_height), ammo the names the player can pick
+Layout = namedtuple('Layout', 'width height target rocks perpetios mirrors wormholes '
+                              'target_arm_distance tank ammo')
+
+
+def intersects(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return (ax < bx + bw and ax + aw > bx and
+            ay < by + bh and ay + ah > by)
+
+
+def generate_rock_positions(screen_width, screen_height, count, avoid_areas=(),
+                            block_size=(150, 150), ground_limit=150, max_attempts=100, rng=random):
+    avoid = list(avoid_areas) + [(0, 0, screen_width, ground_limit)]
+    placed = []
+
+    attempts = 0
+    while len(placed) < count and attempts < max_attempts:
+        attempts += 1
+        x = rng.randint(0, screen_width - block_size[0])
+        y = rng.randint(ground_limit, screen_height - block_size[1])
+        new_area = (x, y, block_size[0], block_size[1])
+
+        if any(intersects(new_area, area) for area in placed):
+            continue
+        if any(intersects(new_area, area) for area in avoid):
+            continue
+        placed.append(new_area)
+    return [(x, y) for x, y, _, _ in placed]
+
+
+def place_boxes(screen_width, screen_height, count, placed, size=(150, 150), margin=(0, 0),
+                ground_limit=150, max_attempts=100, rng=random):
+    # up to `count` boxes clear of `placed`, which grows with every box that fits
+    positions = []
+    for _ in range(count):
+        for _ in range(max_attempts):
+            x = rng.randint(0, screen_width - size[0] - margin[0])
+            y = rng.randint(ground_limit, screen_height - size[1] - margin[1])
+            new_area = (x, y, size[0], size[1])
+            if not any(intersects(new_area, area) for area in placed):
+                positions.append((x, y))
+                placed.append(new_area)
+                break
+    return positions
+
+
+def place_away_from(screen_width, screen_height, anchor, min_distance, placed, size=(150, 150),
+                    ground_limit=150, max_attempts=200, rng=random):
+    # one box at least `min_distance` from the anchor point, or None
+    for _ in range(max_attempts):
+        x = rng.randint(0, screen_width - size[0])
+        y = rng.randint(ground_limit, screen_height - size[1])
+        new_area = (x, y, size[0], size[1])
+        if any(intersects(new_area, area) for area in placed):
+            continue
+        if math.hypot(x - anchor[0], y - anchor[1]) < min_distance:
+            continue
+        placed.append(new_area)
+        return x, y
+    return None
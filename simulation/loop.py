@@ -0,0 +1,37 @@
+from .world import TICK
+
+
+class FixedStepLoop:
+    """Runs ``step(dt)`` at a fixed rate from variable frame times.
+
+    Frame time is banked in an accumulator and spent in whole ticks, at
+    most ``max_steps`` per frame so a long hitch cannot snowball. The
+    returned alpha is how far the render frame sits between the last two
+    ticks, for interpolating sprites.
+    """
+
+    def __init__(self, step, dt=TICK, max_steps=5):
+        self.step = step
+        self.dt = dt
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.dropped = 0.0
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, frame_dt):
+        self.accumulator += frame_dt
+        steps = 0
+        while self.accumulator >= self.dt and steps < self.max_steps:
+            self.step(self.dt)
+            self.accumulator -= self.dt
+            self.ticks += 1
+            steps += 1
+        if self.accumulator >= self.dt:
+            # too far behind: drop the backlog, the simulation slows down instead of spiralling
+            backlog = self.accumulator - self.accumulator % self.dt
+            self.dropped += backlog
+            self.accumulator -= backlog
+        return self.accumulator / self.dt
@@ -0,0 +1,122 @@
+import logging
+import math
+import threading
+import time
+from constants.screen_constants import LASER_DIST
+from .laser import LASER_LENGTH, trace_beam
+
+log = logging.getLogger(__name__)
+
+
+def shell_path(world, kind, x, y, angle, speed, max_ticks=240, every=3, cancelled=None):
+    # steps a snapshot world with one shell in it and samples its center
+    handle = world.spawn_shell(kind, x, y, angle, speed)
+    points = []
+    for tick in range(max_ticks):
+        if cancelled is not None and cancelled():
+            return None
+        last = handle.center
+        world.step()
+        if not handle.alive:
+            points.append(last)
+            break
+        if tick % every == 0:
+            points.append(handle.center)
+    return points
+
+
+def laser_path(world, x, y, angle, spacing=18, cancelled=None):
+    # same reach as a fired beam's front
+    segments, _ = trace_beam(world, x, y, angle, LASER_DIST + LASER_LENGTH)
+    points = []
+    for seg in segments:
+        if cancelled is not None and cancelled():
+            return None
+        steps = max(1, int(math.hypot(seg.x1 - seg.x0, seg.y1 - seg.y0) // spacing))
+        for i in range(steps + 1):
+            k = i / steps
+            points.append((seg.x0 + (seg.x1 - seg.x0) * k, seg.y0 + (seg.y1 - seg.y0) * k))
+    return points
+
+
+class PreviewWorker:
+    """Computes aim previews on a background thread.
+
+    Only the newest request matters: requests arriving within ``debounce``
+    seconds of each other collapse into one, and a computation that gets
+    superseded while running is abandoned through its ``cancelled`` check.
+    The UI thread picks finished results up with :meth:`poll`.
+    """
+
+    def __init__(self, debounce=0.08, idle_timeout=5.0):
+        self.debounce = debounce
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._gen = 0
+        self._job = None
+        self._result = None
+        self._thread = None
+        self._closed = False
+
+    def submit(self, fn, *args):
+        with self._cond:
+            self._gen += 1
+            self._job = (self._gen, time.monotonic() + self.debounce, fn, args)
+            self._result = None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='preview', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._gen += 1
+            self._job = None
+            self._result = None
+
+    def poll(self):
+        # newest finished result, handed out once
+        with self._cond:
+            result, self._result = self._result, None
+        return result
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._job = None
+            self._cond.notify()
+
+    def _stale(self, gen):
+        return gen != self._gen
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    if self._job is None and not self._closed:
+                        self._cond.wait(self.idle_timeout)
+                    if self._closed or self._job is None:
+                        # nothing to do for a while, the next submit starts a new thread
+                        self._thread = None
+                        return
+                    gen, due, fn, args = self._job
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        # a newer request may replace this one while we wait
+                        self._cond.wait(delay)
+                        continue
+                    self._job = None
+                try:
+                    value = fn(*args, cancelled=lambda: self._stale(gen))
+                except Exception:
+                    # that request gets no preview, the next one still does
+                    log.exception("aim preview failed")
+                    continue
+                with self._cond:
+                    if value is not None and not self._stale(gen):
+                        self._result = value
+        finally:
+            with self._cond:
+                # however the thread ended, the next submit must start a new one
+                if self._thread is threading.current_thread():
+                    self._thread = None
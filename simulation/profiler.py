@@ -0,0 +1,104 @@
+from collections import deque
+from time import perf_counter
+from .tracing import TRACE
+
+
+class _Off:
+    # what phase() hands out while profiling is off: entering and leaving it does nothing
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_OFF = _Off()
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'start', 'outer')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+        self.outer = 0.0
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.outer = profiler._nested
+        profiler._nested = 0.0
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self.start
+        profiler = self.profiler
+        # phases nested inside this one already counted their own time
+        profiler.add(self.name, elapsed - profiler._nested)
+        profiler._nested = self.outer + elapsed
+        if TRACE.recording:
+            TRACE.complete(self.name, 'phase', self.start, self.start + elapsed)
+        return False
+
+
+class PhaseProfiler:
+    """Time spent per frame in each named phase of the game loop.
+
+    Code wraps its phases in ``with profiler.phase(name):``; while the
+    profiler is disabled that costs one method call and hands back a shared
+    no-op. Phases may nest; each one is charged only the time not spent in
+    the phases inside it, so a frame's phases add up to its total. Every
+    :meth:`end_frame` closes the running frame, so rolling averages and the
+    worst frame of the last ``window`` frames, broken down by phase, are
+    always available.
+    """
+
+    def __init__(self, window=120):
+        self.enabled = False
+        self.window = window
+        self.frames = deque(maxlen=window)
+        self.current = {}
+        self._phases = {}
+        self._nested = 0.0
+
+    def enable(self, on=True):
+        self.enabled = on
+        self.frames.clear()
+        self.current = {}
+        self._nested = 0.0
+
+    def phase(self, name):
+        if not self.enabled:
+            # a running trace still wants the phases, just not the overlay's bookkeeping
+            return TRACE.span(name, 'phase') if TRACE.recording else _OFF
+        timer = self._phases.get(name)
+        if timer is None:
+            timer = self._phases[name] = _Phase(self, name)
+        return timer
+
+    def add(self, name, seconds):
+        self.current[name] = self.current.get(name, 0.0) + seconds
+
+    def end_frame(self):
+        if self.enabled:
+            self.frames.append(self.current)
+        self.current = {}
+
+    def averages(self):
+        # mean milliseconds per frame for each phase seen in the window
+        totals = {}
+        for frame in self.frames:
+            for name, seconds in frame.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        n = len(self.frames) or 1
+        return {name: total * 1000 / n for name, total in totals.items()}
+
+    def worst(self):
+        # (total ms, {phase: ms}) of the slowest frame in the window
+        if not self.frames:
+            return 0.0, {}
+        frame = max(self.frames, key=lambda f: sum(f.values()))
+        return sum(frame.values()) * 1000, {name: s * 1000 for name, s in frame.items()}
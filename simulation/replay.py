@@ -0,0 +1,255 @@
+"""Input recording and playback.
+
+A replay is the level seed, the state the level started from and every
+input the player gave, each stamped with the number of world ticks that
+had run when it arrived. Inputs are applied between ticks, so feeding the
+same inputs at the same ticks reproduces the game exactly, in the UI or
+headless.
+
+Files are gzipped JSON::
+
+    {"version": 1, "level": 2, "seed": ..., "start": {...}, "events": [[tick, action, arg], ...]}
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from physics import barrel_tip, laser_direction
+from . import bodies
+from .layout import Layout
+from .rng import LevelRng
+from .world import World
+
+VERSION = 1
+
+# events are [tick, action, arg]: rotate 'a'/'d', power +1/-1, move 'left'/'right', ammo, fire
+Replay = namedtuple('Replay', 'level seed start events')
+
+_BODY_TYPES = {cls.__name__: cls for cls in (bodies.Box, bodies.RockBlock, bodies.Perpetio,
+                                              bodies.MovingPerpetio, bodies.Mirror)}
+
+
+def _body_to_dict(body):
+    data = dict(vars(body))
+    data['type'] = type(body).__name__
+    return data
+
+
+def _body_from_dict(data):
+    data = dict(data)
+    cls = _BODY_TYPES[data.pop('type')]
+    body = cls.__new__(cls)
+    body.__dict__.update(data)
+    return body
+
+
+def layout_to_dict(layout):
+    data = layout._asdict()
+    data['target'] = _body_to_dict(layout.target) if layout.target is not None else None
+    for key in ('rocks', 'perpetios', 'mirrors'):
+        data[key] = [_body_to_dict(body) for body in data[key]]
+    data['wormholes'] = [{'portal_a': _body_to_dict(wh.portal_a), 'portal_b': _body_to_dict(wh.portal_b),
+                          'nudge': wh.nudge, 'cooldown': wh.cooldown} for wh in layout.wormholes]
+    return data
+
+
+def layout_from_dict(data):
+    data = dict(data)
+    data['target'] = _body_from_dict(data['target']) if data['target'] is not None else None
+    for key in ('rocks', 'perpetios', 'mirrors'):
+        data[key] = [_body_from_dict(body) for body in data[key]]
+    data['wormholes'] = [bodies.Wormhole(_body_from_dict(wh['portal_a']), _body_from_dict(wh['portal_b']),
+                                         wh['nudge'], wh['cooldown']) for wh in data['wormholes']]
+    data['tank'] = tuple(data['tank']) if data['tank'] is not None else None
+    data['ammo'] = tuple(data['ammo'])
+    return Layout(**data)
+
+
+def start_state(world, tank, ammo, ammo_cycle, shots, attempts=1):
+    # what the level looked like when recording began; tank is the Tank widget.
+    # attempts: how many layouts the seed generated up to this one, so the UI can rebuild it
+    return {
+        'tank': {'x': tank.x, 'y': tank.y, 'angle': tank.angle, 'power': tank.projectile_speed,
+                 'body_width': tank.body_width, 'body_height': tank.body_height,
+                 'barrel_height': tank.barrel_height, 'speed': tank.speed},
+        'ammo': ammo,
+        'ammo_cycle': list(ammo_cycle),
+        'shots': shots,
+        'layout': layout_to_dict(world.layout()),
+        'attempts': attempts,
+    }
+
+
+class ReplayRecorder:
+    def __init__(self, level, seed, start):
+        self.level = level
+        self.seed = seed
+        self.start = start
+        self.events = []
+
+    def record(self, tick, action, arg=None):
+        self.events.append([tick, action, arg])
+
+    def replay(self):
+        return Replay(self.level, self.seed, self.start, self.events)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"level{self.level}-{self.seed}-{int(time.time() * 1000)}.replay")
+        save_replay(self.replay(), path)
+        return path
+
+
+def save_replay(replay, path):
+    data = dict(replay._asdict(), version=VERSION)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+
+
+def load_replay(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.pop('version', None) != VERSION:
+        raise ValueError(f"unsupported replay version in {path}")
+    return Replay(**data)
+
+
+class ReplayPlayer:
+    def __init__(self, replay):
+        self.events = replay.events
+        self.pos = 0
+
+    @property
+    def done(self):
+        return self.pos >= len(self.events)
+
+    def due(self, tick):
+        # inputs that arrived once `tick` ticks had run, in order
+        while self.pos < len(self.events) and self.events[self.pos][0] <= tick:
+            _, action, arg = self.events[self.pos]
+            self.pos += 1
+            yield action, arg
+
+
+class TankState:
+    # the Tank widget rules without the widget
+
+    def __init__(self, x, y, angle, power, body_width=150, body_height=100, barrel_height=60, speed=15):
+        self.x = x
+        self.y = y
+        self.angle = angle
+        self.projectile_speed = power
+        self.body_width = body_width
+        self.body_height = body_height
+        self.barrel_height = barrel_height
+        self.speed = speed
+
+    def rotate_barrel(self, direction):
+        if direction == 'd' and self.angle < 360:
+            self.angle += 2
+        elif direction == 'a' and self.angle > 270:
+            self.angle -= 2
+
+    def increase_power(self):
+        self.projectile_speed = min(self.projectile_speed + 1, 40)
+
+    def decrease_power(self):
+        self.projectile_speed = max(self.projectile_speed - 1, 5)
+
+    def move(self, direction, screen_width):
+        x = self.x - self.speed if direction == 'left' else self.x + self.speed
+        self.x = max(0, min(screen_width / 2 - self.body_width, x))
+
+
+class HeadlessLevel:
+    """A level rebuilt from a replay, driven without any UI."""
+
+    def __init__(self, replay):
+        start = replay.start
+        self.rng = LevelRng(replay.seed)
+        self.world = World.from_layout(layout_from_dict(start['layout']), rng=self.rng.jitter)
+        self.tank = TankState(**start['tank'])
+        self.current_ammo = start['ammo']
+        self.ammo_cycle = start['ammo_cycle']
+        self.remaining_shots = start['shots']
+
+    def apply_input(self, action, arg=None):
+        tank = self.tank
+        if action == 'rotate':
+            tank.rotate_barrel(arg)
+        elif action == 'power':
+            if arg > 0:
+                tank.increase_power()
+            else:
+                tank.decrease_power()
+        elif action == 'move':
+            tank.move(arg, self.world.width)
+        elif action == 'ammo':
+            i = self.ammo_cycle.index(self.current_ammo)
+            self.current_ammo = self.ammo_cycle[(i + 1) % len(self.ammo_cycle)]
+        elif action == 'fire':
+            self.fire()
+
+    def fire(self):
+        if self.remaining_shots <= 0 or self.world.target_hit:
+            return
+        tank = self.tank
+        tip_x, tip_y = barrel_tip(tank.x, tank.y, tank.body_width, tank.body_height,
+                                  tank.barrel_height, tank.angle)
+        if self.current_ammo == "laser":
+            dx, dy = laser_direction(tank.angle)
+            self.world.spawn_laser(tip_x + dx * 2, tip_y + dy * 2, tank.angle)
+        else:
+            self.world.spawn_shell(self.current_ammo, tip_x - 15, tip_y - 15, tank.angle,
+                                   tank.projectile_speed)
+        self.remaining_shots -= 1
+
+
+def play(replay, settle_ticks=600):
+    """Run a replay headless as fast as possible and summarize what happened.
+
+    The digest covers every world event with its tick, so two builds that
+    play a replay the same way produce the same digest.
+    """
+    level = HeadlessLevel(replay)
+    world = level.world
+    player = ReplayPlayer(replay)
+    digest = hashlib.sha1()
+    events = 0
+    last_input = replay.events[-1][0] if replay.events else 0
+    start = time.perf_counter()
+    while True:
+        for action, arg in player.due(world.ticks):
+            level.apply_input(action, arg)
+        if player.done and (not world.live_projectiles or world.ticks > last_input + settle_ticks):
+            break
+        for ev in world.step():
+            digest.update(f"{world.ticks} {ev.kind}\n".encode())
+            events += 1
+        if world.target_hit and player.done:
+            break
+    elapsed = time.perf_counter() - start
+    return {'ticks': world.ticks, 'events': events, 'target_hit': world.target_hit,
+            'shots_left': level.remaining_shots, 'rocks_left': len(world.rocks), 'digest': digest.hexdigest(),
+            'seconds': elapsed}
+
+
+def main(argv):
+    # python -m simulation.replay data/replays/*.replay
+    total_ticks = 0
+    total_seconds = 0.0
+    for path in argv[1:]:
+        result = play(load_replay(path))
+        total_ticks += result['ticks']
+        total_seconds += result['seconds']
+        print(f"{path}: {result['ticks']} ticks, {result['events']} events, "
+              f"hit {result['target_hit']}, digest {result['digest'][:12]}")
+    if total_seconds:
+        print(f"{total_ticks} ticks in {total_seconds:.3f} s ({total_ticks / total_seconds:.0f} ticks/s)")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,27 @@
+import random
+
+
+class LevelRng:
+    """Seeded random streams for one level instance.
+
+    ``layout`` places obstacles, ``motion`` drives moving obstacles and
+    ``jitter`` perturbs laser reflections. Each stream is derived from the
+    level seed on its own, so drawing more numbers from one of them (an
+    extra layout retry, a longer game) never shifts the others.
+    """
+
+    STREAMS = ('layout', 'motion', 'jitter')
+
+    def __init__(self, seed=None):
+        for name in self.STREAMS:
+            setattr(self, name, random.Random())
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        # streams are reseeded in place so whoever holds one keeps a valid reference
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        for name in self.STREAMS:
+            getattr(self, name).seed(f"{seed}:{name}")
+        return seed
@@ -0,0 +1,314 @@
+"""Brute-force solvability check for generated layouts.
+
+Every shot the player can make (angle, power, ammo) is simulated once on a
+copy of the level where rocks do not stop anything: each shot just records
+the rocks it passes through and whether it reaches the target. Rocks never
+bend a path, so from that alone we know what any shot does after any set
+of rocks has been destroyed, and a small breadth-first search over
+destroyed sets gives the minimum number of shots.
+
+Lasers are traced with mirror jitter off, but in play every reflection is
+jittered by up to ``World.mirror_jitter`` degrees, so a laser only counts up
+to the first mirror it meets: a hit or a rock behind a mirror is luck, not a
+solution.
+
+The shot space is split by angle across a process pool. In the game a
+LayoutCheck runs the analysis off the UI thread before the level is shown.
+"""
+import logging
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import numpy as np
+from physics import barrel_tip, laser_direction
+from constants.screen_constants import LASER_DIST
+from .laser import LASER_LENGTH, trace_beam
+from .world import World, earliest_contacts
+
+ANGLES = tuple(range(270, 361, 2))
+POWERS = tuple(range(5, 41))
+MAX_TICKS = 400
+# the game's analyzer leaves the other cores to the game; at least two, so the
+# sweep always runs in the pool's processes and never holds the game's GIL
+GAME_WORKERS = max(2, min(4, os.cpu_count() or 1))
+
+log = logging.getLogger(__name__)
+
+Shot = namedtuple('Shot', 'ammo angle power')
+# rocks: indexes into layout.rocks in the order the shot reaches them
+Outcome = namedtuple('Outcome', 'shot rocks hits_target')
+# solutions: shots that hit the target on the untouched layout
+Report = namedtuple('Report', 'shots solutions min_shots')
+
+
+class _PassThroughWorld(World):
+    # rocks and the target never stop a shell here, contacts with them are only recorded
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.crossings = []
+
+    def _first_contacts(self, duration):
+        rows, slots, s = self._contacts(duration)
+        kinds = np.array([kind or '' for kind in self._slot_kinds])[slots]
+        passing = (kinds == 'rock') | (kinds == 'target')
+        n = self.shells.count
+        toi, first = earliest_contacts(n, rows[~passing], slots[~passing], s[~passing])
+        rows, slots, s = rows[passing], slots[passing], s[passing]
+        # anything after the shell stops or teleports this tick never happened
+        keep = s < toi[rows]
+        rows, slots, s = rows[keep], slots[keep], s[keep]
+        self.crossings.append((self.shells.ids[rows].copy(), slots, self.ticks + s))
+        return toi, first
+
+
+def _shell_outcomes(layout, angles, powers):
+    world = _PassThroughWorld.from_layout(layout, mirror_jitter=0)
+    tank_x, tank_y, body_width, body_height, barrel_height = layout.tank
+    shots = {}
+    for angle in angles:
+        tip_x, tip_y = barrel_tip(tank_x, tank_y, body_width, body_height, barrel_height, angle)
+        for power in powers:
+            # bombs fly exactly like bullets, only their ground impact differs
+            handle = world.spawn_shell('bullet', tip_x - 15, tip_y - 15, angle, power)
+            shots[handle.id] = (angle, power)
+    while world.live_projectiles and world.ticks < MAX_TICKS:
+        world.step()
+    if not world.crossings:
+        return [(angle, power, (), False) for angle, power in shots.values()]
+
+    ids = np.concatenate([c[0] for c in world.crossings])
+    slots = np.concatenate([c[1] for c in world.crossings])
+    times = np.concatenate([c[2] for c in world.crossings])
+    rock_index = {id(block): i for i, block in enumerate(world.rocks)}
+    order = np.lexsort((times, ids))
+    touched = {}
+    for shell_id, slot in zip(ids[order].tolist(), slots[order].tolist()):
+        seen = touched.setdefault(shell_id, [])
+        if slot not in seen:
+            seen.append(slot)
+
+    results = []
+    for shell_id, (angle, power) in shots.items():
+        rocks = []
+        hits = False
+        for slot in touched.get(shell_id, ()):
+            if world._slot_kinds[slot] == 'target':
+                hits = True
+                break
+            rocks.append(rock_index[id(world._slot_refs[slot])])
+        results.append((angle, power, tuple(rocks), hits))
+    return results
+
+
+def _laser_outcomes(layout, angles):
+    world = World.from_layout(layout, mirror_jitter=0)
+    tank_x, tank_y, body_width, body_height, barrel_height = layout.tank
+    rock_index = {id(block): i for i, block in enumerate(world.rocks)}
+    results = []
+    for angle in angles:
+        tip_x, tip_y = barrel_tip(tank_x, tank_y, body_width, body_height, barrel_height, angle)
+        dx, dy = laser_direction(angle)
+        crossed = []
+        _, events = trace_beam(world, tip_x + dx * 2, tip_y + dy * 2, angle,
+                               LASER_DIST + LASER_LENGTH, rocks_crossed=crossed)
+        # the jitter makes everything after the first reflection a gamble
+        reflected = next((ev.distance for ev in events if ev.kind == 'reflect'), None)
+        if reflected is not None:
+            crossed = [(dist, rock) for dist, rock in crossed if dist < reflected]
+        rocks = tuple(rock_index[id(rock)] for _, rock in crossed)
+        results.append((angle, rocks, reflected is None and events[-1].kind == 'target'))
+    return results
+
+
+def _sweep(layout, angles, powers):
+    # one worker's share of the shot space
+    outcomes = []
+    shell_ammo = [ammo for ammo in layout.ammo if ammo != 'laser']
+    if shell_ammo:
+        for angle, power, rocks, hits in _shell_outcomes(layout, angles, powers):
+            outcomes.extend(Outcome(Shot(ammo, angle, power), rocks, hits) for ammo in shell_ammo)
+    if 'laser' in layout.ammo:
+        # power does not change a laser
+        for angle, rocks, hits in _laser_outcomes(layout, angles):
+            outcomes.extend(Outcome(Shot('laser', angle, power), rocks, hits) for power in powers)
+    return outcomes
+
+
+def min_shots(outcomes, max_shots=7):
+    # each shot destroys the first rock on its path that is still standing,
+    # or reaches its end if there is none left
+    paths = {(o.rocks, o.hits_target) for o in outcomes}
+    frontier = {frozenset()}
+    seen = set(frontier)
+    for n in range(1, max_shots + 1):
+        next_frontier = set()
+        for destroyed in frontier:
+            for rocks, hits in paths:
+                rock = next((r for r in rocks if r not in destroyed), None)
+                if rock is None:
+                    if hits:
+                        return n
+                    continue
+                state = destroyed | {rock}
+                if state not in seen:
+                    seen.add(state)
+                    next_frontier.add(state)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return None
+
+
+class SolvabilityAnalyzer:
+    def __init__(self, workers=None, angles=ANGLES, powers=POWERS):
+        self.workers = workers or os.cpu_count() or 1
+        self.angles = angles
+        self.powers = powers
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn, not fork: the game process has a GL context and threads
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def start(self):
+        # spawns the worker processes ahead of the first analysis
+        if self.workers > 1 and self._pool is None:
+            pool = self._executor()
+            for _ in range(self.workers):
+                pool.submit(int)
+
+    def outcomes(self, layout):
+        if self.workers == 1:
+            return _sweep(layout, self.angles, self.powers)
+        chunks = [self.angles[i::self.workers] for i in range(self.workers)]
+        futures = [self._executor().submit(_sweep, layout, chunk, self.powers) for chunk in chunks if chunk]
+        try:
+            return [o for future in futures for o in future.result()]
+        except BrokenProcessPool:
+            # a worker died; the next analysis starts a new pool
+            self._pool = None
+            raise
+
+    def analyze(self, layout, max_shots=7):
+        outcomes = self.outcomes(layout)
+        solutions = sum(1 for o in outcomes if o.hits_target and not o.rocks)
+        return Report(len(outcomes), solutions, min_shots(outcomes, max_shots))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def is_playable(report, max_direct=0.15):
+    # unsolvable within the shot limit, or so open that most shots win, are both rejected
+    if report.min_shots is None:
+        return False
+    return report.solutions <= max_direct * report.shots
+
+
+_analyzer = None
+
+
+def get_analyzer():
+    # the one the game shares between its levels
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = SolvabilityAnalyzer(GAME_WORKERS)
+    return _analyzer
+
+
+class LayoutCheck:
+    """Picks the first playable of a level's candidate layouts on a
+    background thread.
+
+    A level submits all the layouts its seed can give before it is shown
+    and picks the verdict (how many of them to generate) up with
+    :meth:`poll`. The thread mostly waits on the analyzer's processes. Only
+    the newest submission counts.
+    """
+
+    def __init__(self, analyzer=None):
+        self.analyzer = analyzer
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='layout-check')
+        self._future = None
+
+    @property
+    def pending(self):
+        return self._future is not None
+
+    def submit(self, layouts, max_shots=7, max_direct=0.15):
+        self.cancel()
+        self._future = self._executor.submit(self._check, layouts, max_shots, max_direct)
+
+    def _check(self, layouts, max_shots, max_direct):
+        analyzer = self.analyzer or get_analyzer()
+        for attempts, layout in enumerate(layouts, 1):
+            if is_playable(analyzer.analyze(layout, max_shots), max_direct):
+                return attempts
+        # none passed: settle for the last one
+        return len(layouts)
+
+    def poll(self):
+        # the verdict once the check is done, handed out once; None until then
+        if self._future is None or not self._future.done():
+            return None
+        return self.wait()
+
+    def wait(self):
+        future, self._future = self._future, None
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception:
+            # layouts that could not be checked: the first one is kept
+            log.exception("layout check failed")
+            return 1
+
+    def cancel(self):
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+
+def main(argv):
+    # batch check: python -m simulation.solver [layouts] [seed]
+    import random
+    import time
+    from . import bodies
+    from .layout import Layout, generate_rock_positions, place_boxes
+
+    count = int(argv[1]) if len(argv) > 1 else 10
+    rng = random.Random(int(argv[2]) if len(argv) > 2 else 0)
+    width, height = 1280, 720
+    tank = (50, 100, 150, 100, 60)
+    target = bodies.Box(width - 350, 500, 300, 300)
+    analyzer = SolvabilityAnalyzer()
+    for i in range(count):
+        placed = [(50, 100, 150, 100), target.area]
+        rocks = [bodies.RockBlock(x, y) for x, y in
+                 generate_rock_positions(width, height, 11, placed, rng=rng)]
+        placed += [block.area for block in rocks]
+        perpetios = [bodies.Perpetio(x, y, 150, 150)
+                     for x, y in place_boxes(width, height, 3, placed, margin=(30, 30), rng=rng)]
+        mirrors = [bodies.Mirror(x, y, 150, 150, angle=rng.choice([45, 135, 315]))
+                   for x, y in place_boxes(width, height, 2, placed, rng=rng)]
+        layout = Layout(width, height, target, rocks, perpetios, mirrors, [], 0, tank,
+                        ('bullet', 'bomb', 'laser'))
+        start = time.perf_counter()
+        report = analyzer.analyze(layout)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"layout {i}: {report.solutions}/{report.shots} direct hits, "
+              f"min shots {report.min_shots}, playable {is_playable(report)}, {elapsed:.0f} ms")
+    analyzer.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
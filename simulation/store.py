@@ -0,0 +1,147 @@
+import numpy as np
+from physics import GRAVITY
+from constants.screen_constants import FPS, BULLET_MASS, BULLET_RADIUS, BOMB_MASS, BOMB_RADIUS, BOMB_DRILL
+
+SHELL_SIZE = 40
+
+# kind name -> (code, mass, radius, drill)
+SHELL_KINDS = {
+    'bullet': (0, BULLET_MASS, BULLET_RADIUS, 0),
+    'bomb': (1, BOMB_MASS, BOMB_RADIUS, BOMB_DRILL),
+}
+KIND_NAMES = {code: name for name, (code, _, _, _) in SHELL_KINDS.items()}
+
+
+class ShellHandle:
+    """Stable reference to a shell whose row in the store may move on removal."""
+
+    __slots__ = ('store', 'id', 'kind')
+
+    def __init__(self, store, shell_id, kind):
+        self.store = store
+        self.id = shell_id
+        self.kind = kind
+
+    @property
+    def alive(self):
+        return self.id in self.store.index
+
+    @property
+    def pos(self):
+        row = self.store.index[self.id]
+        return float(self.store.x[row]), float(self.store.y[row])
+
+    def lerp_pos(self, alpha):
+        store = self.store
+        row = store.index[self.id]
+        x, px = store.x[row], store.prev_x[row]
+        y, py = store.y[row], store.prev_y[row]
+        return float(px + (x - px) * alpha), float(py + (y - py) * alpha)
+
+    @property
+    def center(self):
+        x, y = self.pos
+        return x + SHELL_SIZE / 2, y + SHELL_SIZE / 2
+
+    @property
+    def velocity(self):
+        row = self.store.index[self.id]
+        return float(self.store.vx[row]), float(self.store.vy[row])
+
+
+class ProjectileStore:
+    """Struct-of-arrays storage for ballistic shells.
+
+    Rows ``[0, count)`` are live. Removal swaps the last row into the hole,
+    so ``index`` maps the stable shell id to its current row.
+    """
+
+    FIELDS = (('x', np.float64), ('y', np.float64), ('prev_x', np.float64), ('prev_y', np.float64),
+              ('vx', np.float64), ('vy', np.float64),
+              ('mass', np.float64), ('radius', np.float64), ('drill', np.float64),
+              ('travel', np.float64), ('age', np.int32), ('wormhole_cd', np.int32),
+              ('kind', np.int8), ('impacted', np.bool_), ('ids', np.int64))
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.count = 0
+        self.index = {}
+        self.handles = {}
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, dtype in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, shell_id, kind, x, y, vx, vy):
+        if self.count == self.capacity:
+            self._grow()
+        code, mass, radius, drill = SHELL_KINDS[kind]
+        row = self.count
+        self.x[row] = self.prev_x[row] = x
+        self.y[row] = self.prev_y[row] = y
+        self.vx[row] = vx
+        self.vy[row] = vy
+        self.mass[row] = mass
+        self.radius[row] = radius
+        self.drill[row] = drill
+        self.travel[row] = 0.0
+        self.age[row] = 0
+        self.wormhole_cd[row] = 0
+        self.kind[row] = code
+        self.impacted[row] = False
+        self.ids[row] = shell_id
+        self.index[shell_id] = row
+        self.count += 1
+        handle = ShellHandle(self, shell_id, kind)
+        self.handles[shell_id] = handle
+        return handle
+
+    def remove(self, shell_id):
+        row = self.index.pop(shell_id)
+        self.handles.pop(shell_id, None)
+        last = self.count - 1
+        if row != last:
+            for name, _ in self.FIELDS:
+                arr = getattr(self, name)
+                arr[row] = arr[last]
+            self.index[int(self.ids[row])] = row
+        self.count = last
+
+    def clear(self):
+        self.count = 0
+        self.index.clear()
+        self.handles.clear()
+
+    def centers(self):
+        n = self.count
+        half = SHELL_SIZE / 2
+        return self.x[:n] + half, self.y[:n] + half
+
+    def integrate(self, dt):
+        n = self.count
+        if not n:
+            return
+        # velocities are expressed per frame at the reference FPS
+        k = dt * FPS
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        dx = self.vx[:n] * k
+        dy = self.vy[:n] * k
+        self.x[:n] += dx
+        self.y[:n] += dy
+        self.vy[:n] -= GRAVITY * k
+        self.travel[:n] += np.hypot(dx, dy)
+        self.age[:n] += 1
+
+        grounded = (self.y[:n] < 0) & ~self.impacted[:n]
+        self.y[:n][grounded] -= self.drill[:n][grounded]
+        self.impacted[:n] |= grounded
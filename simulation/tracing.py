@@ -0,0 +1,127 @@
+"""Timeline recording in Chrome trace format.
+
+Saved files open in chrome://tracing or https://ui.perfetto.dev. Spans are
+"complete" events (ph X) on the thread that ran them; garbage collections
+show up as their own spans under the 'gc' category. While nothing is being
+recorded every hook here is a flag check.
+"""
+import functools
+import gc
+import json
+import os
+import threading
+import time
+from time import perf_counter
+
+
+class _Off:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_OFF = _Off()
+
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, recorder, name, cat, args):
+        self.recorder = recorder
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.complete(self.name, self.cat, self.start, perf_counter(), self.args)
+        return False
+
+
+class TraceRecorder:
+    def __init__(self):
+        self.recording = False
+        self.events = []
+        self._origin = perf_counter()
+        self._gc_start = None
+
+    def start(self):
+        self.events = []
+        self._origin = perf_counter()
+        self.recording = True
+        thread = threading.current_thread()
+        self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': thread.ident,
+                            'args': {'name': thread.name}})
+        gc.callbacks.append(self._on_gc)
+
+    def stop(self):
+        self.recording = False
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _us(self, t):
+        return (t - self._origin) * 1e6
+
+    def complete(self, name, cat, start, end, args=None):
+        if not self.recording:
+            return
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': self._us(start), 'dur': (end - start) * 1e6,
+                 'pid': os.getpid(), 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def instant(self, name, cat='app', args=None):
+        if not self.recording:
+            return
+        event = {'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'ts': self._us(perf_counter()),
+                 'pid': os.getpid(), 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def span(self, name, cat='app', args=None):
+        if not self.recording:
+            return _OFF
+        return _Span(self, name, cat, args)
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_start = perf_counter()
+        elif self._gc_start is not None:
+            self.complete(f"gc gen{info['generation']}", 'gc', self._gc_start, perf_counter(),
+                          {'collected': info['collected']})
+            self._gc_start = None
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms',
+                       'otherData': {'recorded': time.strftime('%Y-%m-%d %H:%M:%S')}}, f)
+        return path
+
+
+TRACE = TraceRecorder()
+
+
+def traced(fn=None, *, cat='app'):
+    """Record every call of ``fn`` as a span while a trace is running."""
+    if fn is None:
+        return functools.partial(traced, cat=cat)
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not TRACE.recording:
+            return fn(*args, **kwargs)
+        with _Span(TRACE, name, cat, None):
+            return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,339 @@
+import copy
+import random
+from collections import namedtuple
+import numpy as np
+from physics import get_initial_velocity
+from constants.screen_constants import FPS
+from .bodies import Box, next_id
+from .broadphase import UniformGrid
+from .collision import swept_bounds, times_of_impact
+from .layout import Layout
+from .profiler import PhaseProfiler
+from .laser import Laser, TERMINAL_KINDS
+from .store import ProjectileStore, SHELL_SIZE
+
+TICK = 1.0 / FPS
+
+# kind is one of: 'rock', 'target', 'perpetio', 'impact', 'teleport', 'reflect'
+Event = namedtuple('Event', 'kind projectile obstacle')
+# events after which the projectile is gone from the world
+REMOVAL_EVENTS = ('rock', 'target', 'perpetio', 'impact')
+
+
+def earliest_contacts(n, rows, slots, s):
+    toi = np.full(n, np.inf)
+    first = np.full(n, -1)
+    order = np.lexsort((s, rows))
+    rows, slots, s = rows[order], slots[order], s[order]
+    earliest = np.ones(len(rows), dtype=bool)
+    earliest[1:] = rows[1:] != rows[:-1]
+    toi[rows[earliest]] = s[earliest]
+    first[rows[earliest]] = slots[earliest]
+    return toi, first
+
+
+class World:
+    """Headless state of a level: obstacles, live projectiles and the per-tick rules."""
+
+    def __init__(self, width=800, height=600, target_arm_distance=0, mirror_jitter=10, rng=random):
+        self.width = width
+        self.height = height
+        # level 1 ignores target hits until the shell has left the barrel area
+        self.target_arm_distance = target_arm_distance
+        self.mirror_jitter = mirror_jitter
+        self.rng = rng
+        self.rocks = []
+        self.perpetios = []
+        self.mirrors = []
+        self.wormholes = []
+        self.target = None
+        self.shells = ProjectileStore()
+        self.lasers = []
+        self.target_hit = False
+        self.ticks = 0
+        # bumped whenever a fixed obstacle moves or anything goes away, so traced laser paths
+        # know to refresh; a moving perpetio only refreshes the beams it crosses (see step)
+        self.layout_version = 0
+        # off unless the debug overlay turns it on
+        self.profiler = PhaseProfiler()
+
+        # every obstacle gets a slot; the grid indexes slots by the cells they cover
+        self.grid = UniformGrid(cell_size=150)
+        self._slot_kinds = []
+        self._slot_refs = []
+        self._slot_boxes = np.zeros((16, 4))
+        self._slot_of = {}
+
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+
+    def _add_slot(self, kind, ref, box):
+        slot = len(self._slot_refs)
+        if slot == len(self._slot_boxes):
+            self._slot_boxes = np.concatenate([self._slot_boxes, np.zeros_like(self._slot_boxes)])
+        self._slot_kinds.append(kind)
+        self._slot_refs.append(ref)
+        self._slot_boxes[slot] = (box.x, box.y, box.right, box.top)
+        self._slot_of[id(ref)] = slot
+        self.grid.insert(slot, self._slot_boxes[slot])
+        return slot
+
+    def _drop_slot(self, ref):
+        slot = self._slot_of.pop(id(ref), None)
+        if slot is not None:
+            self.grid.remove(slot)
+            self._slot_kinds[slot] = None
+            self._slot_refs[slot] = None
+            self.layout_version += 1
+
+    def _move_slot(self, ref, box):
+        # returns the slot's old bounds
+        slot = self._slot_of[id(ref)]
+        old = tuple(self._slot_boxes[slot])
+        self._slot_boxes[slot] = (box.x, box.y, box.right, box.top)
+        self.grid.update(slot, self._slot_boxes[slot])
+        return old
+
+    def set_target(self, x, y, width, height):
+        if self.target is None:
+            self.target = Box(x, y, width, height)
+            self._add_slot('target', self.target, self.target)
+            return
+        self.target.x, self.target.y = float(x), float(y)
+        self.target.width, self.target.height = float(width), float(height)
+        self._move_slot(self.target, self.target)
+        self.layout_version += 1
+
+    def add_rock(self, block):
+        self.rocks.append(block)
+        self._add_slot('rock', block, block)
+
+    def remove_rock(self, block):
+        block.destroyed = True
+        self.rocks.remove(block)
+        self._drop_slot(block)
+
+    def clear_rocks(self):
+        for block in self.rocks:
+            self._drop_slot(block)
+        self.rocks.clear()
+
+    def add_perpetio(self, perp):
+        self.perpetios.append(perp)
+        self._add_slot('perpetio', perp, perp)
+
+    def add_mirror(self, mirror):
+        self.mirrors.append(mirror)
+        self._add_slot('mirror', mirror, mirror)
+
+    def add_wormhole(self, wh):
+        self.wormholes.append(wh)
+        self._add_slot('portal', (wh, wh.portal_a, wh.portal_b), wh.portal_a)
+        self._add_slot('portal', (wh, wh.portal_b, wh.portal_a), wh.portal_b)
+
+    @property
+    def live_projectiles(self):
+        return len(self.shells) + len(self.lasers)
+
+    def clear_projectiles(self):
+        self.shells.clear()
+        self.lasers.clear()
+
+    def reset(self):
+        self.rocks.clear()
+        self.perpetios.clear()
+        self.mirrors.clear()
+        self.wormholes.clear()
+        self.clear_projectiles()
+        self.target_hit = False
+        self.ticks = 0
+        self.grid.clear()
+        self._slot_kinds.clear()
+        self._slot_refs.clear()
+        self._slot_of.clear()
+        if self.target is not None:
+            self._add_slot('target', self.target, self.target)
+
+    def snapshot(self):
+        # detached copy of the level for work off the UI thread; no projectiles, no jitter
+        return World.from_layout(self.layout(), mirror_jitter=0, rng=random.Random(0))
+
+    def layout(self, tank=None, ammo=()):
+        # mirrors and wormholes never change, so they can be shared
+        return Layout(self.width, self.height, copy.copy(self.target),
+                      [copy.copy(block) for block in self.rocks],
+                      [copy.copy(perp) for perp in self.perpetios],
+                      list(self.mirrors), list(self.wormholes),
+                      self.target_arm_distance, tank, tuple(ammo))
+
+    @classmethod
+    def from_layout(cls, layout, **kwargs):
+        world = cls(layout.width, layout.height, layout.target_arm_distance, **kwargs)
+        for block in layout.rocks:
+            world.add_rock(copy.copy(block))
+        for perp in layout.perpetios:
+            world.add_perpetio(copy.copy(perp))
+        for mirror in layout.mirrors:
+            world.add_mirror(mirror)
+        for wh in layout.wormholes:
+            world.add_wormhole(wh)
+        if layout.target is not None:
+            world.set_target(*layout.target.area)
+        return world
+
+    def spawn_shell(self, kind, x, y, angle, speed):
+        vx, vy = get_initial_velocity(angle, speed)
+        return self.shells.add(next_id(), kind, x, y, vx, vy)
+
+    def spawn_laser(self, x, y, angle):
+        p = Laser(x, y, angle)
+        with self.profiler.phase('laser trace'):
+            p.trace(self)
+        self.lasers.append(p)
+        return p
+
+    def obstacles_near(self, x0, y0, x1, y1):
+        kinds = self._slot_kinds
+        refs = self._slot_refs
+        return [(kinds[slot], refs[slot]) for slot in sorted(self.grid.query(x0, y0, x1, y1))]
+
+    def _contacts(self, duration):
+        # every (row, slot, s) contact the rules care about this tick, from the state before integration
+        store = self.shells
+        n = store.count
+        none = np.zeros(0, dtype=np.int64)
+        cx, cy = store.centers()
+        vx = store.vx[:n]
+        vy = store.vy[:n]
+        x0, y0, x1, y1 = swept_bounds(cx, cy, vx, vy, duration)
+        rows, slots = self.grid.query_pairs(x0, y0, x1, y1)
+        if not len(rows):
+            return none, none, np.zeros(0)
+
+        kinds = np.array([kind or '' for kind in self._slot_kinds])[slots]
+        skip = (kinds == 'mirror') | ((kinds == 'portal') & (store.wormhole_cd[:n][rows] > 0))
+        if self.target_arm_distance:
+            armed = store.travel[:n] + np.hypot(vx, vy) * duration >= self.target_arm_distance
+            skip |= (kinds == 'target') & ~armed[rows]
+        boxes = self._slot_boxes[slots]
+        skip |= ((x0[rows] > boxes[:, 2]) | (x1[rows] < boxes[:, 0]) |
+                 (y0[rows] > boxes[:, 3]) | (y1[rows] < boxes[:, 1]))
+        rows, slots, boxes = rows[~skip], slots[~skip], boxes[~skip]
+        if not len(rows):
+            return none, none, np.zeros(0)
+
+        s = times_of_impact(cx[rows], cy[rows], vx[rows], vy[rows], boxes, duration)
+        found = np.isfinite(s)
+        return rows[found], slots[found], s[found]
+
+    def _first_contacts(self, duration):
+        # earliest obstacle each shell touches during this tick
+        rows, slots, s = self._contacts(duration)
+        return earliest_contacts(self.shells.count, rows, slots, s)
+
+    def _teleport_shell(self, row, wh, dst):
+        store = self.shells
+        vx = store.vx[row]
+        vy = store.vy[row]
+        mag = np.hypot(vx, vy) or 1.0
+        dst_x, dst_y = dst.center
+        # snap the previous position too so sprites don't slide across the screen
+        store.x[row] = store.prev_x[row] = dst_x + vx / mag * wh.nudge - SHELL_SIZE / 2
+        store.y[row] = store.prev_y[row] = dst_y + vy / mag * wh.nudge - SHELL_SIZE / 2
+        store.wormhole_cd[row] = wh.cooldown
+
+    def _step_shells(self, dt, events):
+        store = self.shells
+        n = store.count
+        if not n:
+            return False
+        prof = self.profiler
+        with prof.phase('collision'):
+            toi, first = self._first_contacts(dt * FPS)
+        with prof.phase('integrate'):
+            cd = store.wormhole_cd[:n]
+            cd[cd > 0] -= 1
+            store.integrate(dt)
+
+        # resolve contacts in the order they happened during the tick
+        hits = np.flatnonzero(first >= 0)
+        hits = hits[np.argsort(toi[hits], kind='stable')]
+        removed = []
+        hit = False
+        for row in hits:
+            kind = self._slot_kinds[first[row]]
+            ref = self._slot_refs[first[row]]
+            handle = store.handles[int(store.ids[row])]
+            if kind == 'portal':
+                wh, _, dst = ref
+                with prof.phase('teleport'):
+                    self._teleport_shell(row, wh, dst)
+                events.append(Event('teleport', handle, wh))
+                continue
+            if kind is None:
+                # a rock another shell destroyed earlier this tick
+                continue
+            if kind == 'rock':
+                self.remove_rock(ref)
+            removed.append(handle.id)
+            events.append(Event(kind, handle, ref))
+            if kind == 'target':
+                self.target_hit = hit = True
+                break
+
+        if not hit:
+            gone = set(removed)
+            for row in np.flatnonzero(store.impacted[:n]):
+                handle = store.handles[int(store.ids[row])]
+                if handle.id not in gone:
+                    removed.append(handle.id)
+                    events.append(Event('impact', handle, None))
+        for shell_id in removed:
+            store.remove(shell_id)
+        return hit
+
+    def _step_lasers(self, dt, events, moved=()):
+        hit = False
+        prof = self.profiler
+        for p in self.lasers[:]:
+            if p.traced_at != self.layout_version or (moved and p.crosses(moved)):
+                # something on the path moved or was destroyed since it was traced
+                with prof.phase('laser trace'):
+                    p.trace(self, start=p.front)
+            p.advance(dt)
+            while p.pending and p.pending[0].distance <= p.front:
+                event = p.pending.pop(0)
+                p.passed(event)
+                if event.kind == 'rock':
+                    self.remove_rock(event.obstacle)
+                elif event.kind == 'target':
+                    self.target_hit = hit = True
+                if event.kind in TERMINAL_KINDS:
+                    p.has_impacted = True
+                    self.lasers.remove(p)
+                events.append(Event(event.kind, p, event.obstacle))
+                if p.has_impacted:
+                    break
+            if hit:
+                break
+
+    def step(self, dt=TICK):
+        events = []
+        self.ticks += 1
+        prof = self.profiler
+        # old and new bounds of the perpetios that moved this tick
+        moved = []
+        with prof.phase('motion'):
+            for perp in self.perpetios:
+                if hasattr(perp, 'step'):
+                    perp.step(dt)
+                    moved.append(self._move_slot(perp, perp))
+                    moved.append((perp.x, perp.y, perp.right, perp.top))
+
+        # like the old per-widget loop, a target hit ends the tick
+        with prof.phase('resolve'):
+            if not self._step_shells(dt, events):
+                with prof.phase('lasers'):
+                    self._step_lasers(dt, events, moved)
+        return events
@@ -0,0 +1,119 @@
+import random
+import numpy as np
+from simulation import bodies
+from simulation.broadphase import UniformGrid
+from simulation.collision import path_point, times_of_impact
+from simulation.replay import Replay, TankState, load_replay, play, save_replay, start_state
+from simulation.solver import Outcome, Shot, min_shots
+from simulation.store import ProjectileStore
+from simulation.world import World
+
+
+def test_store_remove_swaps_last_row_in():
+    store = ProjectileStore(capacity=2)
+    handles = [store.add(i, 'bullet', i * 10.0, 0.0, 1.0, 0.0) for i in range(5)]
+    store.remove(1)
+    store.remove(4)
+    assert len(store) == 3
+    assert not handles[1].alive and not handles[4].alive
+    for shell_id in (0, 2, 3):
+        row = store.index[shell_id]
+        assert row < store.count
+        assert store.ids[row] == shell_id
+        assert handles[shell_id].pos == (shell_id * 10.0, 0.0)
+    store.add(7, 'bomb', 70.0, 0.0, 0.0, 0.0)
+    assert store.index[7] == 3 and store.handles[7].pos == (70.0, 0.0)
+
+
+def test_grid_query_pairs_matches_brute_force():
+    rng = random.Random(1)
+    grid = UniformGrid(cell_size=150)
+    cell_boxes = {}
+    for slot in range(40):
+        x, y = rng.uniform(-200, 1200), rng.uniform(-200, 800)
+        box = (x, y, x + rng.uniform(1, 300), y + rng.uniform(1, 300))
+        grid.insert(slot, box)
+        cell_boxes[slot] = box
+    for slot in range(0, 40, 3):
+        grid.remove(slot)
+        del cell_boxes[slot]
+    grid.update(1, (0, 0, 10, 10))
+    cell_boxes[1] = (0, 0, 10, 10)
+
+    x0 = np.array([rng.uniform(-300, 1200) for _ in range(60)])
+    y0 = np.array([rng.uniform(-300, 800) for _ in range(60)])
+    x1 = x0 + np.array([rng.uniform(0, 400) for _ in range(60)])
+    y1 = y0 + np.array([rng.uniform(0, 400) for _ in range(60)])
+    rows, slots = grid.query_pairs(x0, y0, x1, y1)
+    pairs = set(zip(rows.tolist(), slots.tolist()))
+    assert len(pairs) == len(rows)
+
+    for i in range(len(x0)):
+        found = {slot for row, slot in pairs if row == i}
+        assert found == grid.query(x0[i], y0[i], x1[i], y1[i])
+        # cells can only add candidates, never lose an overlapping box
+        overlapping = {slot for slot, (bx0, by0, bx1, by1) in cell_boxes.items()
+                       if bx0 <= x1[i] and bx1 >= x0[i] and by0 <= y1[i] and by1 >= y0[i]}
+        assert overlapping <= found
+
+
+def test_swept_hits_include_per_frame_hits():
+    rng = np.random.default_rng(2)
+    n = 2000
+    x = rng.uniform(0, 400, n)
+    y = rng.uniform(0, 400, n)
+    vx = rng.uniform(-60, 60, n)
+    vy = rng.uniform(-60, 60, n)
+    boxes = np.tile([150.0, 150.0, 250.0, 200.0], (n, 1))
+    duration = 1.0
+    toi = times_of_impact(x, y, vx, vy, boxes, duration)
+
+    # a shell seen inside the box at any point of the tick was hit no later than that
+    for s in np.linspace(0, duration, 9):
+        px, py = path_point(x, y, vx, vy, s)
+        inside = (px >= 150) & (px <= 250) & (py >= 150) & (py <= 200)
+        assert np.all(toi[inside] <= s + 1e-9)
+
+    hit = np.isfinite(toi)
+    px, py = path_point(x[hit], y[hit], vx[hit], vy[hit], toi[hit])
+    assert np.all((px >= 150 - 1e-6) & (px <= 250 + 1e-6) & (py >= 150 - 1e-6) & (py <= 200 + 1e-6))
+
+
+def _replay():
+    world = World(1280, 720, rng=random.Random(0))
+    world.set_target(930, 400, 300, 300)
+    for x, y in ((400, 0), (600, 300), (800, 100)):
+        world.add_rock(bodies.RockBlock(x, y))
+    world.add_mirror(bodies.Mirror(500, 500, angle=135))
+    tank = TankState(50, 100, 300, 15)
+    start = start_state(world, tank, 'bullet', ('bullet', 'bomb', 'laser'), 6)
+    events = [[0, 'fire', None], [5, 'rotate', 'a'], [5, 'power', 1], [40, 'fire', None],
+              [41, 'ammo', None], [41, 'ammo', None], [90, 'fire', None], [120, 'rotate', 'd'],
+              [150, 'fire', None]]
+    return Replay(2, 1234, start, events)
+
+
+def test_replay_digest_is_stable(tmp_path):
+    replay = _replay()
+    first = play(replay)
+    assert first['events'] > 0
+    assert play(replay)['digest'] == first['digest']
+
+    path = tmp_path / 'level2.replay'
+    save_replay(replay, path)
+    loaded = play(load_replay(path))
+    assert (loaded['digest'], loaded['ticks']) == (first['digest'], first['ticks'])
+
+
+def _outcome(rocks, hits):
+    return Outcome(Shot('bullet', 300, 15), tuple(rocks), hits)
+
+
+def test_min_shots():
+    assert min_shots([_outcome((), True)]) == 1
+    # the only way to the target is through two rocks
+    assert min_shots([_outcome((0, 1), True), _outcome((), False)]) == 3
+    # the route through fewer rocks wins
+    assert min_shots([_outcome((0, 1), True), _outcome((2,), True)]) == 2
+    assert min_shots([_outcome((0, 1, 2), True)], max_shots=3) is None
+    assert min_shots([_outcome((0,), False)]) is None
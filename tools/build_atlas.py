@@ -0,0 +1,57 @@
+"""Pack the game sprites into one Kivy atlas, each scaled to the size it is drawn at.
+
+    python tools/build_atlas.py              # images/atlas/game.atlas + game-0.png
+    python tools/build_atlas.py --scale 2    # for high-DPI screens
+
+The screens pick the atlas up automatically (screens/sprites.py); delete
+images/atlas to go back to the plain files. Re-run after changing a sprite
+or its entry in SPRITES.
+"""
+import os
+import sys
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import argparse
+import tempfile
+from PIL import Image
+from screens.sprites import ATLAS, SPRITES
+
+
+def scaled(path, size, mode, scale):
+    img = Image.open(path).convert('RGBA')
+    box = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+    if mode == 'fill':
+        return img.resize(box, Image.LANCZOS)
+    img.thumbnail(box, Image.LANCZOS)
+    return img
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--size', type=int, default=1024, help='atlas page size in pixels')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier on the display sizes')
+    args = parser.parse_args(argv)
+
+    from kivy.atlas import Atlas
+    os.makedirs(os.path.dirname(ATLAS), exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for name, (filename, size, mode) in SPRITES.items():
+            # atlas ids are the file names without extension
+            out = os.path.join(tmp, name + '.png')
+            scaled(os.path.join('images', filename), size, mode, args.scale).save(out)
+            files.append(out)
+        result = Atlas.create(ATLAS, files, args.size)
+    if not result:
+        raise SystemExit(f"sprites do not fit in {args.size}x{args.size}, try a larger --size")
+    atlas_path, meta = result
+    pages = ', '.join(f"{page} ({len(ids)} sprites)" for page, ids in meta.items())
+    print(f"wrote {atlas_path}: {pages}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])